@@ -0,0 +1,174 @@
+"""
+Аллокации на ход: разбор хода, id клетки, id клеток доски - до и после таблицы клеток.
+
+    python -m benchmarks.allocations
+    python -m benchmarks.allocations --moves 5000
+
+"before" - прежний код (сборка строки клетки и поиск по Enum на каждый вызов),
+"after" - текущий код из src. Для каждой операции считаются блоки памяти, которые
+остаются после неё (результаты сохраняются), и пик временной памяти одного вызова.
+"""
+import argparse
+import gc
+import random
+import sys
+import tracemalloc
+from enum import Enum
+
+from pydantic import BaseModel, Field
+
+from src.cells import BOARD_SIZE, CELL_IDS, COLUMN_NAMES
+from src.game_board import BitBoard, generate_fleet, index_to_cell_id, mask_to_indexes
+from src.game_rules import resolve_move
+from src.protocol import decode_move
+from src.schemas import ClientMessage
+
+
+class LegacyHorizontalNameCell(Enum):
+    A = 0
+    B = 1
+    C = 2
+    D = 3
+    E = 4
+    F = 5
+    G = 6
+    H = 7
+    I = 8
+    J = 9
+
+
+class LegacyClientMessage(BaseModel):
+    x: str = Field(pattern='^[a-jA-J]$')
+    y: int = Field(ge=1, le=10)
+
+
+def legacy_cell_id(row: int, col: int) -> str:
+    return LegacyHorizontalNameCell(col).name.lower() + str(row + 1)
+
+
+def legacy_move_cell(message) -> str:
+    LegacyHorizontalNameCell[message.x.upper()].value
+    return message.x.lower() + str(message.y)
+
+
+def move_cell(message) -> str:
+    return CELL_IDS[message.cell_index]
+
+
+def legacy_decode_move(data: bytes):
+    row, col = divmod(data[0], BOARD_SIZE)
+    return LegacyClientMessage.model_construct(x=LegacyHorizontalNameCell(col).name.lower(), y=row + 1)
+
+
+def legacy_validate_move(data: str):
+    return LegacyClientMessage.model_validate_json(data)
+
+
+def validate_move(data: str):
+    return ClientMessage.model_validate_json(data)
+
+
+def legacy_fleet_cells(mask: int) -> list[str]:
+    return [legacy_cell_id(*divmod(index, BOARD_SIZE)) for index in mask_to_indexes(mask)]
+
+
+def fleet_cells(mask: int) -> list[str]:
+    return [index_to_cell_id(index) for index in mask_to_indexes(mask)]
+
+
+def traced() -> tuple[int, int]:
+    snapshot = tracemalloc.take_snapshot()
+    statistics = snapshot.statistics("filename")
+    return sum(stat.count for stat in statistics), sum(stat.size for stat in statistics)
+
+
+def retained(operation, inputs: list) -> tuple[float, float]:
+    # блоки и байты, которые остаются после вызова, пока результат жив
+    results = [None] * len(inputs)
+    gc.collect()
+    tracemalloc.start()
+    start_blocks, start_size = traced()
+    for i, value in enumerate(inputs):
+        results[i] = operation(value)
+    end_blocks, end_size = traced()
+    tracemalloc.stop()
+    return (end_blocks - start_blocks) / len(inputs), (end_size - start_size) / len(inputs)
+
+
+def peak(operation, inputs: list) -> float:
+    # средний пик памяти одного вызова сверх того, что было до него
+    total = 0
+    tracemalloc.start()
+    for value in inputs:
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        operation(value)
+        total += tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.stop()
+    return total / len(inputs)
+
+
+def resolve_game_moves(moves: int) -> list:
+    # каждая доска обстреливается целиком, в случайном порядке
+    rng = random.Random(0)
+    inputs = []
+    while len(inputs) < moves:
+        board = BitBoard.from_public(generate_fleet().to_public())
+        for index in rng.sample(range(BOARD_SIZE * BOARD_SIZE), BOARD_SIZE * BOARD_SIZE):
+            inputs.append((board, index))
+            if len(inputs) == moves:
+                break
+    return inputs
+
+
+def resolve(board_and_index):
+    board, index = board_and_index
+    return resolve_move(
+        target_board=board,
+        cell_index=index,
+        player_id=1,
+        player_name="player1",
+        player2_id=2,
+        player2_name="player2",
+        next_step_player_name="player1",
+        player2_connected=True,
+        game_finished=False,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Allocations per move before and after the cell table.")
+    parser.add_argument("--moves", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    indexes = [rng.randrange(BOARD_SIZE * BOARD_SIZE) for _ in range(args.moves)]
+    json_moves = [f'{{"x": "{COLUMN_NAMES[index % BOARD_SIZE]}", "y": {index // BOARD_SIZE + 1}}}' for index in indexes]
+    binary_moves = [bytes([index]) for index in indexes]
+    messages = [ClientMessage.model_validate_json(data) for data in json_moves]
+    legacy_messages = [LegacyClientMessage.model_validate_json(data) for data in json_moves]
+    fleets = [generate_fleet().fleet_mask for _ in range(max(args.moves // 20, 1))]
+
+    scenarios = [
+        ("move validate (json)", legacy_validate_move, json_moves, validate_move, json_moves),
+        ("move decode (binary)", legacy_decode_move, binary_moves, decode_move, binary_moves),
+        ("move cell id", legacy_move_cell, legacy_messages, move_cell, messages),
+        ("fleet cell ids (20)", legacy_fleet_cells, fleets, fleet_cells, fleets),
+    ]
+    print(f"{'per call':<22} {'blocks':>8} {'':>8} {'bytes':>9} {'':>9} {'peak, B':>9} {'':>9}")
+    print(f"{'':<22} {'before':>8} {'after':>8} {'before':>9} {'after':>9} {'before':>9} {'after':>9}")
+    for name, legacy_operation, legacy_inputs, operation, inputs in scenarios:
+        before_blocks, before_size = retained(legacy_operation, legacy_inputs)
+        after_blocks, after_size = retained(operation, inputs)
+        print(f"{name:<22} {before_blocks:>8.2f} {after_blocks:>8.2f} {before_size:>9.1f} {after_size:>9.1f}"
+              f" {peak(legacy_operation, legacy_inputs):>9.1f} {peak(operation, inputs):>9.1f}")
+
+    # для сравнения: ход целиком, со всеми событиями
+    blocks, size = retained(resolve, resolve_game_moves(args.moves))
+    print(f"{'resolve_move (after)':<22} {'':>8} {blocks:>8.2f} {'':>9} {size:>9.1f}"
+          f" {'':>9} {peak(resolve, resolve_game_moves(args.moves)):>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,314 @@
+"""
+Нагрузочный прогон: регистрирует пользователей, логинит их, создаёт игры
+и доигрывает их до конца через /games/{game_sid}/play.
+
+    # приложение уже запущено (например, docker-compose up)
+    python -m benchmarks.loadtest --base-url http://127.0.0.1:8080 --games 200 --concurrency 50
+
+    # поднять приложение локально на SQLite (нужен aiosqlite)
+    python -m benchmarks.loadtest --serve sqlite+aiosqlite:///loadtest.db --games 200
+
+    # поднять приложение на локальном Postgres из .env (миграции через alembic)
+    python -m benchmarks.loadtest --serve env --games 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import struct
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter
+
+import httpx
+import websockets
+
+from src.game_board import SHIP_SIZES
+
+CELLS = [(row, col) for row in range(10) for col in range(10)]
+LETTERS = "abcdefghij"
+BINARY_SUBPROTOCOL = "battleship.binary.v1"
+EVENT_FRAME = struct.Struct("!BBI")
+# коды событий компактного протокола, см. src/schemas/game_messages.py
+BINARY_EVENTS = {
+    0: "error", 1: "connected", 2: "disconnected", 3: "start", 4: "resumed",
+    5: "paused", 6: "turn", 7: "already_checked", 8: "move", 9: "miss",
+    10: "hit", 11: "sunk", 12: "win",
+}
+# события, которыми сервер отвечает на ход; результат выстрела получают оба игрока
+SHOT_RESULTS = {"miss", "hit", "sunk"}
+MOVE_RESULTS = SHOT_RESULTS | {"already_checked", "turn", "paused", "error"}
+
+
+class Stats:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: Counter = Counter()
+        self.rejected = 0
+        self.games_finished = 0
+        self.moves = 0
+
+    def record(self, name: str, seconds: float):
+        self.latencies.setdefault(name, []).append(seconds)
+
+    def error(self, name: str):
+        self.errors[name] += 1
+
+
+def percentile(values: list[float], percent: float) -> float:
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(percent / 100 * len(values)) - 1))
+    return values[index]
+
+
+class Player:
+    def __init__(self, username: str):
+        self.username = username
+        self.password = uuid.uuid4().hex
+        self.token = ""
+        self.id = 0
+
+
+async def request(client: httpx.AsyncClient, stats: Stats, name: str, method: str, url: str, **kwargs) -> httpx.Response:
+    # 429 от пула bcrypt - штатная перегрузка, повторяем после Retry-After
+    for _ in range(20):
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        if response.status_code != 429:
+            stats.record(name, time.perf_counter() - started)
+            response.raise_for_status()
+            return response
+        stats.rejected += 1
+        await asyncio.sleep(float(response.headers.get("Retry-After", 1)))
+    raise RuntimeError(f"{name}: too many 429 responses")
+
+
+async def prepare_player(client: httpx.AsyncClient, stats: Stats, player: Player):
+    response = await request(client, stats, "register", "POST", "/players/register", json={
+        "username": player.username,
+        "password": player.password,
+    })
+    player.id = response.json()["id"]
+    response = await request(client, stats, "login", "POST", "/players/login", data={
+        "username": player.username,
+        "password": player.password,
+    })
+    player.token = response.json()["access_token"]
+
+
+class GameSocket:
+    def __init__(self, websocket, binary: bool):
+        self.websocket = websocket
+        self.binary = binary
+        self.events: asyncio.Queue = asyncio.Queue()
+        self.reader = asyncio.create_task(self.read())
+
+    async def read(self):
+        try:
+            async for frame in self.websocket:
+                if self.binary:
+                    code, _, player_id = EVENT_FRAME.unpack(frame)
+                    await self.events.put((BINARY_EVENTS[code], player_id))
+                else:
+                    event = json.loads(frame)
+                    await self.events.put((event["event"], event["player_id"]))
+        except websockets.ConnectionClosed:
+            pass
+        await self.events.put(("closed", 0))
+
+    async def wait_for(self, names: set[str], timeout: float) -> tuple[str, int]:
+        while True:
+            event = await asyncio.wait_for(self.events.get(), timeout)
+            if event[0] in names or event[0] == "closed":
+                return event
+
+    async def send_move(self, row: int, col: int):
+        if self.binary:
+            await self.websocket.send(bytes([row * 10 + col]))
+        else:
+            await self.websocket.send(json.dumps({"x": LETTERS[col], "y": row + 1}))
+
+    async def close(self):
+        await self.websocket.close()
+        await self.reader
+
+
+async def play_game(ws_url: str, game_sid: int, players: list[Player], args, stats: Stats):
+    binary = args.protocol == "binary"
+    sockets: dict[int, GameSocket] = {}
+    try:
+        for player in players:
+            url = f"{ws_url}/games/{game_sid}/play?token={player.token}"
+            websocket = await websockets.connect(
+                url,
+                subprotocols=[BINARY_SUBPROTOCOL] if binary else None,
+                open_timeout=args.timeout,
+            )
+            sockets[player.id] = GameSocket(websocket, binary)
+
+        event, current = await sockets[players[0].id].wait_for({"start", "resumed"}, args.timeout)
+        if event == "closed":
+            raise RuntimeError("socket closed before start")
+
+        # каждый игрок стреляет по клеткам в случайном порядке - игра гарантированно заканчивается
+        targets = {player.id: random.sample(CELLS, len(CELLS)) for player in players}
+        sunk = Counter()
+        while True:
+            row, col = targets[current].pop()
+            started = time.perf_counter()
+            await sockets[current].send_move(row, col)
+            event, player_id = await sockets[current].wait_for(MOVE_RESULTS, args.timeout)
+            stats.record("move", time.perf_counter() - started)
+            stats.moves += 1
+            opponent = next(player.id for player in players if player.id != current)
+            if event in SHOT_RESULTS:
+                # копия результата у соперника, чтобы его очередь событий не отставала
+                await sockets[opponent].wait_for({event}, args.timeout)
+            if event == "sunk":
+                sunk[current] += 1
+                if sunk[current] == len(SHIP_SIZES):
+                    # за последним потопленным кораблём сразу идёт win
+                    for player_id in (current, opponent):
+                        event, _ = await sockets[player_id].wait_for({"win"}, args.timeout)
+                        if event != "win":
+                            raise RuntimeError(f"unexpected {event} event")
+                    break
+            if event not in SHOT_RESULTS:
+                stats.error(f"move:{event}")
+                if event in ("closed", "error", "paused"):
+                    raise RuntimeError(f"unexpected {event} event")
+                continue
+            current = player_id
+        stats.games_finished += 1
+    finally:
+        for socket in sockets.values():
+            await socket.close()
+
+
+async def run_game(client: httpx.AsyncClient, ws_url: str, args, stats: Stats, semaphore: asyncio.Semaphore):
+    async with semaphore:
+        prefix = uuid.uuid4().hex[:12]
+        players = [Player(f"load_{prefix}_1"), Player(f"load_{prefix}_2")]
+        try:
+            for player in players:
+                await prepare_player(client, stats, player)
+            response = await request(client, stats, "create", "POST", "/games/create", headers={
+                "Authorization": f"Bearer {players[0].token}",
+                "player2-name": players[1].username,
+            })
+            await play_game(ws_url, response.json()["sid"], players, args, stats)
+        except Exception as e:
+            stats.error(type(e).__name__)
+
+
+def report(stats: Stats, elapsed: float, args):
+    print(f"games: {stats.games_finished}/{args.games} finished in {elapsed:.2f}s "
+          f"(concurrency {args.concurrency}, protocol {args.protocol})")
+    print(f"moves: {stats.moves} total, {stats.moves / elapsed:.1f} moves/s")
+    print(f"{'operation':<10} {'count':>7} {'mean':>9} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}  (ms)")
+    for name, values in stats.latencies.items():
+        row = [statistics.fmean(values)] + [percentile(values, p) for p in (50, 90, 99)] + [max(values)]
+        print(f"{name:<10} {len(values):>7} " + " ".join(f"{value * 1000:>9.2f}" for value in row))
+    total_errors = sum(stats.errors.values())
+    print(f"errors: {total_errors} ({total_errors / max(args.games, 1):.1%} of games), 429 retries: {stats.rejected}")
+    for name, count in stats.errors.most_common():
+        print(f"  {name}: {count}")
+
+
+def prepare_database(env: dict[str, str]):
+    if env.get("DB_URL", "").startswith("sqlite"):
+        # схему для SQLite создаём напрямую, миграции рассчитаны на Postgres
+        code = (
+            "from sqlmodel import SQLModel, create_engine; import src.models; "
+            "from src.config import db_settings; "
+            "url = db_settings.database_url_asyncpg().replace('+aiosqlite', ''); "
+            "SQLModel.metadata.drop_all(create_engine(url)); SQLModel.metadata.create_all(create_engine(url))"
+        )
+        subprocess.run([sys.executable, "-c", code], env=env, check=True)
+    else:
+        subprocess.run(["alembic", "upgrade", "head"], env=env, check=True)
+
+
+def start_server(env: dict[str, str], base_url: str) -> subprocess.Popen:
+    host, port = base_url.split("//", 1)[1].rsplit(":", 1)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app", "--host", host, "--port", port, "--log-level", "warning"],
+        env=env,
+        # echo движка SQLAlchemy пишет в stdout и перемешивается с отчётом
+        stdout=subprocess.DEVNULL,
+    )
+
+
+def server_env(serve: str) -> dict[str, str]:
+    env = dict(os.environ)
+    if serve != "env":
+        env["DB_URL"] = serve
+    return env
+
+
+def serve(args) -> subprocess.Popen:
+    env = server_env(args.serve)
+    prepare_database(env)
+    return start_server(env, args.base_url)
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float, path: str = "/ready", interval: float = 0.2):
+    # /ready отвечает 503, пока воркер прогревается
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            response = await client.get(path)
+            if response.status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"{path} is not ready after {timeout}s")
+        await asyncio.sleep(interval)
+
+
+async def main(args):
+    stats = Stats()
+    ws_url = "ws" + args.base_url[len("http"):]
+    limits = httpx.Limits(max_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        await wait_ready(client, args.timeout)
+        semaphore = asyncio.Semaphore(args.concurrency)
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            run_game(client, ws_url, args, stats, semaphore) for _ in range(args.games)
+        ))
+        elapsed = time.perf_counter() - started
+    report(stats, elapsed, args)
+    return 1 if stats.errors else 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Drive concurrent simulated games against the battleship API.")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8080")
+    parser.add_argument("--games", type=int, default=100, help="number of games to play to completion")
+    parser.add_argument("--concurrency", type=int, default=20, help="games in flight at the same time")
+    parser.add_argument("--protocol", choices=("json", "binary"), default="json")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for any single response")
+    parser.add_argument(
+        "--serve",
+        metavar="DB_URL",
+        help="start the app locally first: a database URL, or 'env' to use DB_* from .env",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    server = serve(args) if args.serve else None
+    try:
+        code = asyncio.run(main(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    sys.exit(code)
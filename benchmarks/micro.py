@@ -0,0 +1,163 @@
+"""
+Микро-бенчмарки game_board и разрешения хода.
+
+    python -m benchmarks.micro                # сравнить с benchmarks/baseline.json
+    python -m benchmarks.micro --save         # перезаписать baseline на этой машине
+    python -m benchmarks.micro -k board
+
+Базовые значения зависят от машины: после смены железа их нужно пересохранить.
+Скрипт только печатает отчёт и не проверяет регрессии: проверки поведения - в tests/.
+"""
+import argparse
+import json
+import random
+import timeit
+import warnings
+from pathlib import Path
+
+from src.game_board import (
+    BitBoard, BOARD_SIZE, ShotResult, build_placements, generate_board, generate_cell_id,
+    generate_fleet,
+)
+from src.game_rules import resolve_move
+from src.schemas import GameBoardPublic
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+# роуты используют parse_obj, замеряем именно его
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+
+def bench_generate_cell_id():
+    for row in range(BOARD_SIZE):
+        for col in range(BOARD_SIZE):
+            generate_cell_id(row, col)
+
+
+def bench_build_placements():
+    build_placements(4)
+
+
+def bench_generate_fleet():
+    generate_fleet()
+
+
+def bench_generate_board():
+    generate_board()
+
+
+BOARD_DATA = generate_board().model_dump()
+
+
+def bench_board_parse_obj():
+    GameBoardPublic.parse_obj(BOARD_DATA)
+
+
+BOARD_PUBLIC = GameBoardPublic.parse_obj(BOARD_DATA)
+
+
+def bench_bitboard_from_public():
+    BitBoard.from_public(BOARD_PUBLIC)
+
+
+def bench_bitboard_to_public():
+    BitBoard.from_public(BOARD_PUBLIC).to_public()
+
+
+BOARD_BYTES = BitBoard.from_public(BOARD_PUBLIC).to_bytes()
+
+
+def bench_bitboard_from_bytes():
+    BitBoard.from_bytes(BOARD_BYTES)
+
+
+def bench_bitboard_to_bytes():
+    BitBoard.from_bytes(BOARD_BYTES).to_bytes()
+
+
+SHOTS = random.Random(0).sample(range(100), 100)
+
+
+def bench_resolve_game():
+    # одна сторона доигрывает до победы: все промахи, попадания и потопления
+    board = BitBoard.from_public(BOARD_PUBLIC)
+    for index in SHOTS:
+        resolution = resolve_move(
+            target_board=board,
+            cell_index=index,
+            player_id=1,
+            player_name="player1",
+            player2_id=2,
+            player2_name="player2",
+            next_step_player_name="player1",
+            player2_connected=True,
+            game_finished=False,
+            )
+        if resolution.shot == ShotResult.WIN:
+            break
+
+
+def bench_resolve_rejected():
+    resolve_move(
+        target_board=None,
+        cell_index=0,
+        player_id=1,
+        player_name="player1",
+        player2_id=2,
+        player2_name="player2",
+        next_step_player_name="player2",
+        player2_connected=True,
+        game_finished=False,
+        )
+
+
+BENCHMARKS = {
+    name[len("bench_"):]: function
+    for name, function in globals().items()
+    if name.startswith("bench_")
+}
+
+
+def measure(function, repeat: int) -> float:
+    # минимум из нескольких прогонов меньше всего зависит от шума;
+    # генерация флота зависит от случайных чисел, поэтому каждый прогон начинается с одного seed
+    timer = timeit.Timer(function)
+    random.seed(0)
+    number, _ = timer.autorange()
+    times = []
+    for _ in range(repeat):
+        random.seed(0)
+        times.append(timer.timeit(number))
+    return min(times) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for game_board and move resolution.")
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("-k", dest="pattern", default="", help="run only benchmarks containing this substring")
+    args = parser.parse_args()
+
+    baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    results = {}
+    print(f"{'benchmark':<24} {'time, us':>10} {'baseline':>10} {'change':>8}")
+    for name, function in BENCHMARKS.items():
+        if args.pattern not in name:
+            continue
+        seconds = measure(function, args.repeat)
+        results[name] = round(seconds, 9)
+        line = f"{name:<24} {seconds * 1e6:>10.2f}"
+        if name in baseline:
+            change = seconds / baseline[name] - 1
+            line += f" {baseline[name] * 1e6:>10.2f} {change:>+8.1%}"
+        print(line)
+
+    if args.save:
+        # значения удалённых бенчмарков не сохраняются
+        baseline = {name: seconds for name, seconds in baseline.items() if name in BENCHMARKS}
+        baseline.update(results)
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=4, sort_keys=True) + "\n")
+        print(f"baseline saved to {BASELINE_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Время старта воркера: импорт приложения и прогрев до готовности.
+
+    # время импорта src.main и самые тяжёлые пакеты
+    python -m benchmarks.startup
+
+    # плюс запуск приложения: время до /health, до /ready и первые запросы
+    python -m benchmarks.startup --serve sqlite+aiosqlite:///startup.db
+    python -m benchmarks.startup --serve env --cold     # первые запросы сразу, без ожидания /ready
+"""
+import argparse
+import asyncio
+import re
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter
+
+import httpx
+
+from benchmarks.loadtest import prepare_database, server_env, start_server, wait_ready
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def measure_import(module: str) -> tuple[float, float, Counter]:
+    # -X importtime пишет в stderr время каждого модуля в микросекундах
+    started_at = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+    wall_time = time.perf_counter() - started_at
+    total = 0.0
+    packages: Counter = Counter()
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, _, name = match.groups()
+        packages[name.split(".", 1)[0]] += int(self_us) / 1e6
+        if name == module:
+            total = int(cumulative_us) / 1e6
+    return wall_time, total, packages
+
+
+def report_imports(args):
+    runs = [measure_import(args.module) for _ in range(args.repeat)]
+    wall_times = [wall_time for wall_time, _, _ in runs]
+    totals = [total for _, total, _ in runs]
+    print(f"import {args.module}: {statistics.median(totals) * 1000:.0f} ms "
+          f"(process {statistics.median(wall_times) * 1000:.0f} ms, median of {args.repeat})")
+    packages: Counter = Counter()
+    for _, _, run_packages in runs:
+        packages.update(run_packages)
+    print(f"{'package':<24} {'self, ms':>10}")
+    for package, seconds in packages.most_common(args.top):
+        print(f"{package:<24} {seconds / args.repeat * 1000:>10.1f}")
+
+
+async def timed(client: httpx.AsyncClient, method: str, url: str, **kwargs) -> float:
+    started_at = time.perf_counter()
+    await client.request(method, url, **kwargs)
+    return time.perf_counter() - started_at
+
+
+async def report_startup(args):
+    env = server_env(args.serve)
+    prepare_database(env)
+    started_at = time.perf_counter()
+    server = start_server(env, args.base_url)
+    try:
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+            await wait_ready(client, args.timeout, path="/health", interval=0.02)
+            listening = time.perf_counter() - started_at
+            if not args.cold:
+                await wait_ready(client, args.timeout, interval=0.02)
+            ready = time.perf_counter() - started_at
+
+            # первый и второй одинаковый запрос: разница - то, что прогрев не успел или не смог сделать
+            suffix = uuid.uuid4().hex[:8]
+            requests = {
+                "register (bcrypt)": [
+                    ("POST", "/players/register", {"json": {"username": f"startup{i}_{suffix}", "password": "startup"}})
+                    for i in range(2)
+                ],
+                "stats summary (db)": [
+                    ("GET", f"/players/startup{i}_{suffix}/stats/summary", {}) for i in range(2)
+                ],
+            }
+            timings = {}
+            for name, calls in requests.items():
+                timings[name] = [await timed(client, method, url, **kwargs) for method, url, kwargs in calls]
+            warm_up = {
+                line.split()[0]: line.split()[1]
+                for line in (await client.get("/metrics")).text.splitlines()
+                if line.startswith("battleship_warm_up_")
+            }
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"listening after {listening * 1000:.0f} ms, ready after {ready * 1000:.0f} ms"
+          + (" (--cold: /ready not awaited)" if args.cold else ""))
+    for name, value in warm_up.items():
+        print(f"  {name[len('battleship_warm_up_'):]}: {value}")
+    print(f"{'first requests':<24} {'first, ms':>10} {'second, ms':>11}")
+    for name, (first, second) in timings.items():
+        print(f"{name:<24} {first * 1000:>10.1f} {second * 1000:>11.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time and warm-up time of the battleship app.")
+    parser.add_argument("--module", default="src.main")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="packages to show by import time")
+    parser.add_argument(
+        "--serve",
+        metavar="DB_URL",
+        help="also start the app: a database URL, or 'env' to use DB_* from .env",
+    )
+    parser.add_argument("--base-url", default="http://127.0.0.1:8090")
+    parser.add_argument("--cold", action="store_true", help="send the first requests without waiting for /ready")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    report_imports(args)
+    if args.serve:
+        print()
+        asyncio.run(report_startup(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
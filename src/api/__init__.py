@@ -2,10 +2,14 @@ from fastapi import APIRouter
 from .auth import auth_router
 from .routes import routes
 from .websockets import websoket_router
+from .metrics import metrics_router
+from .health import health_router
 
 
 
 api_router = APIRouter()
 api_router.include_router(auth_router)
 api_router.include_router(routes)
-api_router.include_router(websoket_router)
\ No newline at end of file
+api_router.include_router(websoket_router)
+api_router.include_router(metrics_router)
+api_router.include_router(health_router)
\ No newline at end of file
@@ -1,32 +1,96 @@
-from src.config import jwt_settings
+from src.config import jwt_settings, cache_settings
+from src.cache import TTLCache
 from src.schemas import UserAuthPublic, UserPublic, TokenWithRefresh
-from src.models import User
-from passlib.context import CryptContext
+from src.models import User, PlayerStats
+from src.user_cache import CachedUser, user_cache
+from src.password_hasher import password_hasher, HasherBusyError
 from fastapi import APIRouter, Depends, Body, HTTPException, status, Header, WebSocket, Query, WebSocketException
 from typing import Annotated
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from src.api.dependencies import SessionDep
+from src import database
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import select, exists
 from datetime import datetime, timedelta
 from jwt.exceptions import InvalidTokenError
 import jwt
+import time
 
 
 auth_router = APIRouter()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 LOGIN_URL = "/players/login"
 DEFAULT_ACCESS_TOKEN_EXPIRE_MINUTES=15
 DEFAULT_REFRESH_TOKEN_EXPIRE_DAYS=7
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=LOGIN_URL)
 
-def verify_password(plain_password, hashed_password) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+# token -> username, хранится не дольше срока действия токена
+token_cache: TTLCache[str, str] = TTLCache(
+    max_size=cache_settings.token_cache_max_size,
+    ttl=jwt_settings.jwt_access_token_expire_minutes * 60,
+)
+
+def hasher_busy_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Server busy, retry later",
+        headers={"Retry-After": "1"},
+    )
+
+async def verify_password(plain_password, hashed_password) -> bool:
+    try:
+        return await password_hasher.verify(plain_password, hashed_password)
+    except HasherBusyError:
+        raise hasher_busy_exception()
+
+async def get_password_hash(password) -> str:
+    try:
+        return await password_hasher.hash(password)
+    except HasherBusyError:
+        raise hasher_busy_exception()
+
+def decode_token_subject(token: str) -> str:
+    username = token_cache.get(token)
+    if username is not None:
+        return username
+
+    payload = jwt.decode(
+        token, 
+        jwt_settings.jwt_secret_key, 
+        algorithms=[jwt_settings.jwt_algorithm],
+        )
+    username = payload.get("sub")
+    if username is None:
+        raise InvalidTokenError("Token has no subject")
+
+    expire = payload.get("exp")
+    if expire is not None:
+        token_cache.set(token, username, ttl=min(expire - time.time(), token_cache.ttl))
+    return username
+
+async def get_user_by_username(username: str, async_session: AsyncSession) -> CachedUser | None:
+    user = user_cache.get(username)
+    if user is not None:
+        return user
+
+    user_db = await async_session.execute(
+        select(User).where(
+            User.username==username,
+        )
+    )
+    user_db = user_db.scalars().first()
+    if user_db is None:
+        return None
+
+    user = CachedUser.from_user(user_db)
+    user_cache.set(username, user)
+    return user
 
-def get_password_hash(password) -> str:
-    return pwd_context.hash(password)
+async def get_user_by_token(token: str, async_session: AsyncSession) -> CachedUser | None:
+    username = decode_token_subject(token)
+    return await get_user_by_username(username, async_session)
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
@@ -38,6 +102,11 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     encoded_jwt = jwt.encode(to_encode, jwt_settings.jwt_secret_key, algorithm=jwt_settings.jwt_algorithm)
     return encoded_jwt
 
+def warm_up_tokens():
+    # первый encode/decode загружает реализацию алгоритма подписи
+    token = create_access_token(data={"sub": ""}, expires_delta=timedelta(minutes=1))
+    jwt.decode(token, jwt_settings.jwt_secret_key, algorithms=[jwt_settings.jwt_algorithm])
+
 def create_refresh_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     if expires_delta:
@@ -58,15 +127,22 @@ async def register_user(
     )
     user_is_exist = user_is_exist.scalars().first()
     
+    user_exists_exception = HTTPException(
+        status_code=status.HTTP_409_CONFLICT, 
+        detail=f"User with name \"{input_body.username}\" already exists.")
     if user_is_exist:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT, 
-            detail=f"User with name \"{input_body.username}\" already exists.")
+        raise user_exists_exception
 
     user_db = User.model_validate(input_body)
-    user_db.password = get_password_hash(user_db.password)
+    user_db.password = await get_password_hash(user_db.password)
     async_session.add(user_db)
-    await async_session.commit()
+    try:
+        await async_session.flush()
+        async_session.add(PlayerStats(player_id=user_db.id))
+        await async_session.commit()
+    except IntegrityError:
+        # то же имя успели зарегистрировать, пока считался хеш пароля
+        raise user_exists_exception
     await async_session.refresh(user_db)
     return user_db
 
@@ -90,7 +166,7 @@ async def login(
     
     if not user_db:
         raise incorrect_exception
-    if not verify_password(form_data.password, user_db.password):
+    if not await verify_password(form_data.password, user_db.password):
         raise incorrect_exception
 
     access_token_expires = timedelta(minutes=jwt_settings.jwt_access_token_expire_minutes)
@@ -121,12 +197,7 @@ async def refresh_token(
         if username is None:
             raise credentials_exception
 
-        user_db = await async_session.execute(
-        select(User).where(
-            User.username==username,
-            )
-        )
-        user_db = user_db.scalars().first()
+        user_db = await get_user_by_username(username, async_session)
         
         if not user_db:
             raise credentials_exception
@@ -141,28 +212,14 @@ async def refresh_token(
 async def check_access_token(
     token: Annotated[str, Depends(oauth2_scheme)],
     async_session: SessionDep,
-    ) -> User:
+    ) -> CachedUser:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(
-            token, 
-            jwt_settings.jwt_secret_key, 
-            algorithms=[jwt_settings.jwt_algorithm],
-            )
-        username = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-
-        user_db = await async_session.execute(
-        select(User).where(
-            User.username==username,
-            )
-        )
-        user_db = user_db.scalars().first()
+        user_db = await get_user_by_token(token, async_session)
         
         if not user_db:
             raise credentials_exception
@@ -174,28 +231,15 @@ async def check_access_token(
 async def check_access_token_websocket(
     websocket: WebSocket,
     token: Annotated[str , Query()],
-    async_session: SessionDep,
-    ) -> User:
+    ) -> CachedUser:
     credentials_exception = WebSocketException(
             code=status.WS_1008_POLICY_VIOLATION,
             reason="Error: Could not validate credentials"
         )
     try:
-        payload = jwt.decode(
-            token, 
-            jwt_settings.jwt_secret_key, 
-            algorithms=[jwt_settings.jwt_algorithm],
-            )
-        username = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-
-        user_db = await async_session.execute(
-        select(User).where(
-            User.username==username,
-            )
-        )
-        user_db = user_db.scalars().first()
+        # зависимость живёт всё время соединения, поэтому сессия берётся только на проверку
+        async with database.async_session() as async_session:
+            user_db = await get_user_by_token(token, async_session)
         
         if not user_db:
             raise credentials_exception
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, HTTPException, status
+from src.broker import broker
+from src.warmup import warm_up
+
+health_router = APIRouter()
+
+@health_router.get("/health", include_in_schema=False)
+async def get_health() -> dict[str, str]:
+    # процесс жив и отвечает
+    return {"status": "ok"}
+
+@health_router.get("/ready", include_in_schema=False)
+async def get_ready() -> dict[str, str]:
+    # балансировщик отправляет трафик только после прогрева пула БД, bcrypt и флотов;
+    # пока обязательный шаг падает и повторяется, воркер не готов
+    if not warm_up.ready:
+        failing = sorted(warm_up.failing)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Warm-up failed: {', '.join(failing)}" if failing else "Warming up",
+        )
+    if not broker.connected:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Message broker is disconnected",
+        )
+    return {"status": "ready"}
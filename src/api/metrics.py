@@ -0,0 +1,44 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from src.metrics import metrics
+from src.database import pool_stats
+from src.api.auth import token_cache
+from src.user_cache import user_cache
+from src.api.routes import lobby_cache
+from src.connection_manager import manager
+from src.game_registry import game_registry
+from src.fleet_pool import fleet_pool
+from src.move_log import move_log
+from src.presence import presence
+from src.password_hasher import password_hasher
+from src.warmup import warm_up
+
+metrics_router = APIRouter()
+
+CACHE_COUNTERS = ("hits", "misses")
+
+metrics.add_collector("websocket", lambda: {"connections": len(manager.active_connections)})
+metrics.add_collector("games", game_registry.stats, counters=(
+    "snapshot_hits", "snapshot_misses", "expired_snapshots", "lock_waits", "lock_wait_total",
+))
+metrics.add_collector("fleet_pool", fleet_pool.stats, counters=(
+    "hits", "misses", "refills", "generated", "failed_refills",
+))
+metrics.add_collector("move_log", move_log.stats, counters=("written", "dropped", "flushes", "failed_flushes"))
+metrics.add_collector("presence", presence.stats, counters=("written", "flushes", "failed_flushes"))
+metrics.add_collector("password_hasher", password_hasher.stats, counters=(
+    "calls", "rejected", "wait_time_total", "run_time_total",
+))
+metrics.add_collector("user_cache", user_cache.stats, counters=CACHE_COUNTERS)
+metrics.add_collector("token_cache", token_cache.stats, counters=CACHE_COUNTERS)
+metrics.add_collector("lobby_cache", lobby_cache.stats, counters=CACHE_COUNTERS)
+metrics.add_collector("db_pool", pool_stats)
+metrics.add_collector("warm_up", warm_up.stats, counters=("failed",))
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    return metrics.render()
+
+@metrics_router.get("/metrics/db_pool")
+async def get_db_pool_stats() -> dict[str, int]:
+    return pool_stats()
@@ -1,138 +1,223 @@
-from fastapi import APIRouter, Depends, HTTPException, Header, status
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, status
 from typing import Annotated
 from src.api.dependencies import SessionDep
-from src.api.auth import check_access_token
-from sqlmodel import select, exists, or_, and_
+from src.api.auth import check_access_token, get_user_by_username
+from src.user_cache import CachedUser
+from src.cache import TTLCache
+from src.config import cache_settings
+from sqlmodel import select, insert, or_
 from sqlalchemy.orm import joinedload
-from src.schemas import UserPublic, GameResult, GamePublic, GamePlayerPublic, GameBoardPublic
-from src.models import User, Game, GameBoard, Ship
-from src.game_board import generate_board
+from src.schemas import (
+    UserPublic, GameResult, ACTIVE_GAME_RESULTS, FINISHED_GAME_RESULTS,
+    GamePublic, GamePlayerPublic, PlayerStatsPublic,
+)
+from src.models import User, Game, GameBoard, Move, PlayerStats
+from src.fleet_pool import fleet_pool
+from src.presence import presence
+from src.game_board import BitBoard, cell_id_to_index
 
 routes = APIRouter()
 
+LOBBY_DEFAULT_LIMIT = 50
+LOBBY_MAX_LIMIT = 200
+STATS_DEFAULT_LIMIT = 20
+STATS_MAX_LIMIT = 100
+
+# (after_id, limit, prefix) -> [(id, username)], общий снимок страницы лобби для всех игроков
+lobby_cache: TTLCache[tuple[int, int, str], list[tuple[int, str]]] = TTLCache(
+    max_size=cache_settings.lobby_cache_max_size,
+    ttl=cache_settings.lobby_cache_ttl_seconds,
+)
+
 @routes.get("/players", response_model=list[UserPublic])
 async def get_all_disabled_users(
     async_session: SessionDep,
-    player: Annotated[User, Depends(check_access_token)],
+    player: Annotated[CachedUser, Depends(check_access_token)],
+    after_id: Annotated[int, Query(ge=0)] = 0,
+    limit: Annotated[int, Query(ge=1, le=LOBBY_MAX_LIMIT)] = LOBBY_DEFAULT_LIMIT,
+    prefix: Annotated[str, Query(max_length=64)] = "",
     ):
-    users_db = await async_session.execute(
-        select(User).where(
-            User.disabled==True,
-            User.id != player.id,
-        )
-    )
-    users_db = users_db.scalars().all()
-
-    return users_db
+    # постраничная выборка по id: следующая страница - after_id = id последнего игрока
+    cache_key = (after_id, limit, prefix)
+    users = lobby_cache.get(cache_key)
+    if users is None:
+        # в кешируемом запросе только флаг из БД: страница не зависит от состояния воркера
+        query = select(User.id, User.username).where(User.disabled==True, User.id > after_id)
+        if prefix:
+            query = query.where(User.username.startswith(prefix, autoescape=True))
+        # +1 - на случай, если в страницу попадёт сам игрок
+        users_db = await async_session.execute(query.order_by(User.id).limit(limit + 1))
+        users = [tuple(row) for row in users_db.all()]
+        lobby_cache.set(cache_key, users)
+
+    # онлайн-статус в БД отстаёт на интервал записи presence: отключившиеся от этого воркера
+    # добавляются, а подключённые к нему убираются уже после кеша. Другие воркеры это не видят
+    # за последним игроком полной страницы могут быть игроки из БД, которых в ней нет
+    last_id = users[-1][0] if len(users) > limit else None
+    offline = [
+        (user_id, username)
+        for user_id, username in presence.pending_offline().items()
+        if user_id > after_id and (last_id is None or user_id <= last_id) and username.startswith(prefix)
+    ]
+    if offline:
+        users = sorted(set(users).union(offline))
+    return [
+        UserPublic(id=user_id, username=username, disabled=True)
+        for user_id, username in users
+        if user_id != player.id and user_id not in presence.online
+    ][:limit]
 
 @routes.post("/games/create", response_model=GamePlayerPublic)
 async def create_game(
     async_session: SessionDep,
     player2_name: Annotated[str, Header()],
-    player1: Annotated[User, Depends(check_access_token)],
+    player1: Annotated[CachedUser, Depends(check_access_token)],
     ):
-    player2 = await async_session.execute(
-        select(User).where(
-            User.username==player2_name,
-        )
-    )
-    player2 = player2.scalars().first()
+    player2 = await get_user_by_username(player2_name, async_session)
     if not player2:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
             detail=f"User with name \"{player2_name}\" not found.",
         )
     
-    player1_board: GameBoardPublic = generate_board()
-    player2_board: GameBoardPublic = generate_board()
+    player1_board, player2_board = fleet_pool.pop_many(2)
+    boards = {player1.id: player1_board, player2.id: player2_board}
+
+    # игра и обе доски - два INSERT без ORM-объектов и повторной выборки
+    game_sid = await async_session.execute(
+        insert(Game).values(
+            result=GameResult.NOT_STARTED.value,
+            player1_name=player1.username,
+            player2_name=player2.username,
+            player1_id=player1.id,
+            player2_id=player2.id,
+        ).returning(Game.sid)
+    )
+    game_sid = game_sid.scalar_one()
+
+    await async_session.execute(
+        insert(GameBoard).values([
+            {"game_sid": game_sid, "player_id": player_id, "board": board.data}
+            for player_id, board in boards.items()
+        ])
+    )
+    await async_session.commit()
 
-    game_db: Game = Game(
+    return GamePlayerPublic(
+        sid=game_sid,
         result=GameResult.NOT_STARTED.value,
         player1_name=player1.username,
         player2_name=player2.username,
-        player1_id=player1.id,
-        player2_id=player2.id
+        player_lived_board=player1_board.public,
     )
 
-    player1_board_db: GameBoard = GameBoard(ships=[])
-    for ship in player1_board.ships:
-        player1_board_db.ships.append(Ship(name=ship.name, location=ship.location))
-
-    player2_board_db: GameBoard = GameBoard(ships=[])
-    for ship in player2_board.ships:
-        player2_board_db.ships.append(Ship(name=ship.name, location=ship.location))
-
-    player1_board_db.player_id = player1.id
-    player2_board_db.player_id = player2.id
-
-    game_db.players_lived_board.extend([player1_board_db, player2_board_db])
-
-    async_session.add(game_db)
-    await async_session.commit()
-    await async_session.refresh(game_db)
-
-    game = GamePlayerPublic.parse_obj(game_db)
-
-    for player_lived_board in game_db.players_lived_board:
-        if player_lived_board.player_id == player1.id:
-            game.player_lived_board = GameBoardPublic.parse_obj(player_lived_board)
+def select_player_games(player_id: int, results: tuple[str, ...]):
+    # result IN (...) вместо пары !=, чтобы индексы (player*_id, result) использовались целиком
+    return select(Game).where(
+        or_(
+            Game.player1_id == player_id,
+            Game.player2_id == player_id
+        ),
+        Game.result.in_(results),
+    ).options(
+        # только доска самого игрока: одна строка на игру
+        joinedload(Game.players_lived_board.and_(GameBoard.player_id == player_id)),
+    )
 
-    return game
+def select_player_history(player_id: int, before_sid: int, limit: int):
+    query = select(Game).where(
+        or_(
+            Game.player1_id == player_id,
+            Game.player2_id == player_id
+        ),
+        Game.result.in_(FINISHED_GAME_RESULTS),
+    )
+    if before_sid:
+        query = query.where(Game.sid < before_sid)
+    return query.order_by(Game.sid.desc()).limit(limit)
 
 @routes.get("/games", response_model=list[GamePlayerPublic])
 async def get_not_ended_games(
     async_session: SessionDep,
-    player: Annotated[User, Depends(check_access_token)],
+    player: Annotated[CachedUser, Depends(check_access_token)],
     ):
-    games_db = await async_session.execute(
-        select(Game).where(
-            or_(
-                Game.player1_id == player.id,
-                Game.player2_id == player.id
-            ),
-            or_(
-                Game.result == GameResult.NOT_ENDED.value,
-                Game.result == GameResult.NOT_STARTED.value,
-            )
-        ).options(joinedload(Game.players_lived_board))
-    )
+    games_db = await async_session.execute(select_player_games(player.id, ACTIVE_GAME_RESULTS))
     games_db = games_db.unique().scalars().all()
 
+    # выстрелы соперника по доске игрока хранятся в журнале ходов
+    moves_db = await async_session.execute(
+        select(Move.game_sid, Move.cell).where(
+            Move.game_sid.in_([game_db.sid for game_db in games_db]),
+            Move.shooter_id != player.id,
+        )
+    )
+    opponent_shots: dict[int, list[str]] = {}
+    for game_sid, cell in moves_db.all():
+        opponent_shots.setdefault(game_sid, []).append(cell)
+
     games: list[GamePlayerPublic] = []
     for game_db in games_db:
         game = GamePlayerPublic.parse_obj(game_db)
         for player_lived_board in game_db.players_lived_board:
             if player_lived_board.player_id == player.id:
-                game.player_lived_board = GameBoardPublic.parse_obj(player_lived_board)
+                board = BitBoard.from_bytes(player_lived_board.board)
+                for cell in opponent_shots.get(game_db.sid, []):
+                    board.shoot(cell_id_to_index(cell))
+                game.player_lived_board = board.to_public()
         games.append(game)
 
     return games
 
 @routes.get("/players/{player_name}/stats", response_model=list[GamePublic])
-async def get_game_stats_players(async_session: SessionDep, player_name: str):
-    player = await async_session.execute(
-        select(User).where(
+async def get_game_stats_players(
+    async_session: SessionDep,
+    player_name: str,
+    before_sid: Annotated[int, Query(ge=0)] = 0,
+    limit: Annotated[int, Query(ge=1, le=STATS_MAX_LIMIT)] = STATS_DEFAULT_LIMIT,
+    ):
+    # от новых игр к старым: следующая страница - before_sid = sid последней игры
+    player_id = await async_session.execute(
+        select(User.id).where(
             User.username==player_name,
         )
     )
-    player = player.scalars().first()
-    if not player:
+    player_id = player_id.scalars().first()
+    if player_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
             detail=f"Player with name \"{player_name}\" not found.",
         )
-    games_db = await async_session.execute(
-        select(Game).where(
-            or_(
-                Game.player1_id == player.id,
-                Game.player2_id == player.id
-            ),
-            and_(
-                Game.result != GameResult.NOT_ENDED.value,
-                Game.result != GameResult.NOT_STARTED.value
-            )
-        ).options(joinedload(Game.players_lived_board))
+    games_db = await async_session.execute(select_player_history(player_id, before_sid, limit))
+    games_db = games_db.scalars().all()
+
+    return games_db
+
+@routes.get("/players/{player_name}/stats/summary", response_model=PlayerStatsPublic)
+async def get_player_stats_summary(async_session: SessionDep, player_name: str):
+    # сводка считается при завершении игр, здесь только чтение одной строки
+    stats_db = await async_session.execute(
+        select(User.username, PlayerStats).outerjoin(
+            PlayerStats, PlayerStats.player_id == User.id,
+        ).where(
+            User.username==player_name,
+        )
+    )
+    stats_db = stats_db.first()
+    if stats_db is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, 
+            detail=f"Player with name \"{player_name}\" not found.",
+        )
+    username, stats = stats_db
+    if stats is None:
+        stats = PlayerStats()
+
+    return PlayerStatsPublic(
+        username=username,
+        games_played=stats.games_played,
+        wins=stats.wins,
+        losses=stats.losses,
+        win_rate=stats.wins / stats.games_played if stats.games_played else 0.0,
+        # среднее число ходов игрока за игру
+        average_game_length=stats.total_moves / stats.logged_games if stats.logged_games else 0.0,
     )
-    games_db = games_db.unique().scalars().all()
-
-    return games_db
\ No newline at end of file
@@ -0,0 +1,312 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Awaitable, Callable
+from redis import asyncio as aioredis
+from src.config import broker_settings
+
+logger = logging.getLogger(__name__)
+
+MessageHandler = Callable[[dict], Awaitable[None]]
+
+# ключ меняется, только если им всё ещё владеет этот воркер: между GET и DEL/EXPIRE
+# ключ мог истечь и достаться другому воркеру
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+# истёкший и никем не занятый ключ занимается снова - игра всё ещё на этом воркере
+RENEW_SCRIPT = """
+local owner = redis.call('get', KEYS[1])
+if owner == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+if not owner then
+    redis.call('set', KEYS[1], ARGV[1], 'EX', ARGV[2])
+    return 1
+end
+return 0
+"""
+
+# пауза перед повторной подпиской после обрыва соединения с Redis, удваивается до максимума
+RESUBSCRIBE_DELAY_SECONDS = 0.5
+RESUBSCRIBE_MAX_DELAY_SECONDS = 30.0
+
+def worker_channel(worker_id: str) -> str:
+    return f"battleship:worker:{worker_id}"
+
+def player_key(player_id: int) -> str:
+    return f"battleship:player:{player_id}"
+
+def game_key(game_sid: int) -> str:
+    return f"battleship:game:{game_sid}"
+
+def message_order_key(message: dict) -> str:
+    # сообщения одной игры (join, move, leave) и события одному игроку обрабатываются по порядку,
+    # сообщения разных игр и игроков - параллельно
+    if "game_sid" in message:
+        return game_key(message["game_sid"])
+    return player_key(message["player_id"])
+
+class MessageBroker(ABC):
+    def __init__(self, worker_id: str):
+        self.worker_id = worker_id
+        self.handler: MessageHandler | None = None
+        # False, пока воркер не получает сообщения других воркеров - /ready отвечает 503
+        self.connected = True
+        self._queues: dict[str, deque[dict]] = {}
+        self._handler_tasks: set[asyncio.Task] = set()
+
+    @abstractmethod
+    async def start(self, handler: MessageHandler):
+        ...
+
+    @abstractmethod
+    async def stop(self):
+        ...
+
+    @abstractmethod
+    async def send_to_worker(self, worker_id: str, message: dict):
+        ...
+
+    @abstractmethod
+    async def claim(self, key: str) -> str:
+        # возвращает id воркера-владельца: свой, если ключ был свободен
+        ...
+
+    @abstractmethod
+    async def release(self, key: str):
+        ...
+
+    @abstractmethod
+    async def get_owner(self, key: str) -> str | None:
+        ...
+
+    def dispatch(self, message: dict):
+        # обработчик может ждать БД и lock игры, поэтому не выполняется в цикле приёма:
+        # у каждой игры и игрока своя очередь и своя задача, пока в очереди есть сообщения
+        if self.handler is None:
+            return
+        key = message_order_key(message)
+        queue = self._queues.get(key)
+        if queue is not None:
+            queue.append(message)
+            return
+        queue = self._queues[key] = deque([message])
+        task = asyncio.create_task(self._drain(key, queue))
+        self._handler_tasks.add(task)
+        task.add_done_callback(self._handler_tasks.discard)
+
+    async def _drain(self, key: str, queue: deque[dict]):
+        try:
+            while queue:
+                message = queue.popleft()
+                try:
+                    await self.handler(message)
+                except Exception:
+                    logger.exception("Failed to handle broker message %r", message)
+        finally:
+            self._queues.pop(key, None)
+
+    async def stop_handlers(self):
+        tasks = list(self._handler_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+class InMemoryHub:
+    # общее состояние для InMemoryBroker; несколько брокеров на одном hub
+    # ведут себя как воркеры, подключённые к одной шине
+    def __init__(self):
+        self.queues: dict[str, asyncio.Queue] = {}
+        self.owners: dict[str, str] = {}
+
+class InMemoryBroker(MessageBroker):
+    def __init__(self, worker_id: str, hub: InMemoryHub | None = None):
+        super().__init__(worker_id)
+        self.hub = hub or InMemoryHub()
+        self._dispatch_task: asyncio.Task | None = None
+
+    async def start(self, handler: MessageHandler):
+        self.handler = handler
+        queue = asyncio.Queue()
+        self.hub.queues[self.worker_id] = queue
+        self._dispatch_task = asyncio.create_task(self._dispatch_loop(queue))
+
+    async def stop(self):
+        self.hub.queues.pop(self.worker_id, None)
+        if self._dispatch_task is not None:
+            self._dispatch_task.cancel()
+            try:
+                await self._dispatch_task
+            except asyncio.CancelledError:
+                pass
+            self._dispatch_task = None
+        await self.stop_handlers()
+        for key, owner in list(self.hub.owners.items()):
+            if owner == self.worker_id:
+                del self.hub.owners[key]
+
+    async def _dispatch_loop(self, queue: asyncio.Queue):
+        while True:
+            message = await queue.get()
+            self.dispatch(message)
+
+    async def send_to_worker(self, worker_id: str, message: dict):
+        queue = self.hub.queues.get(worker_id)
+        if queue is None:
+            logger.warning("Worker %s is not connected, message dropped", worker_id)
+            return
+        queue.put_nowait(message)
+
+    async def claim(self, key: str) -> str:
+        return self.hub.owners.setdefault(key, self.worker_id)
+
+    async def release(self, key: str):
+        if self.hub.owners.get(key) == self.worker_id:
+            del self.hub.owners[key]
+
+    async def get_owner(self, key: str) -> str | None:
+        return self.hub.owners.get(key)
+
+class RedisBroker(MessageBroker):
+    def __init__(self, worker_id: str, url: str, claim_ttl: int, client=None):
+        super().__init__(worker_id)
+        if client is None:
+            client = aioredis.from_url(url, decode_responses=True)
+        # client должен возвращать str (decode_responses=True); подходит и fakeredis
+        self.client = client
+        self.claim_ttl = claim_ttl
+        self.claims: set[str] = set()
+        self._release_script = client.register_script(RELEASE_SCRIPT)
+        self._renew_script = client.register_script(RENEW_SCRIPT)
+        self.connected = False
+        self._pubsub = None
+        self._listen_task: asyncio.Task | None = None
+        self._heartbeat_task: asyncio.Task | None = None
+
+    async def start(self, handler: MessageHandler):
+        self.handler = handler
+        await self._subscribe()
+        self._listen_task = asyncio.create_task(self._listen_loop())
+        self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+
+    async def stop(self):
+        for task in (self._listen_task, self._heartbeat_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._listen_task = self._heartbeat_task = None
+        await self.stop_handlers()
+        for key in list(self.claims):
+            await self.release(key)
+        await self._close_pubsub()
+
+    async def _subscribe(self):
+        self._pubsub = self.client.pubsub()
+        await self._pubsub.subscribe(worker_channel(self.worker_id))
+        self.connected = True
+
+    async def _close_pubsub(self):
+        self.connected = False
+        if self._pubsub is not None:
+            pubsub, self._pubsub = self._pubsub, None
+            try:
+                await pubsub.unsubscribe()
+                await pubsub.aclose()
+            except Exception:
+                # соединение уже оборвано - закрывать нечего
+                pass
+
+    async def _listen_loop(self):
+        delay = RESUBSCRIBE_DELAY_SECONDS
+        while True:
+            try:
+                if self._pubsub is None:
+                    await self._subscribe()
+                    logger.info("Resubscribed to %s", worker_channel(self.worker_id))
+                delay = RESUBSCRIBE_DELAY_SECONDS
+                async for item in self._pubsub.listen():
+                    if item["type"] != "message":
+                        continue
+                    try:
+                        message = json.loads(item["data"])
+                    except ValueError:
+                        logger.warning("Dropped malformed broker message %r", item["data"])
+                        continue
+                    self.dispatch(message)
+                # listen() заканчивается, только если подписка пропала
+                raise ConnectionError("Broker subscription ended")
+            except Exception:
+                # без подписки пересланные ходы не доходят: пока она не восстановлена, воркер не готов
+                logger.exception("Broker subscription failed, resubscribing in %.1fs", delay)
+                await self._close_pubsub()
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RESUBSCRIBE_MAX_DELAY_SECONDS)
+
+    async def _heartbeat_loop(self):
+        # продлевает владение игроками и играми, пока воркер жив
+        while True:
+            await asyncio.sleep(self.claim_ttl / 3)
+            if not self.claims:
+                continue
+            try:
+                await self.renew_claims()
+            except Exception:
+                logger.exception("Failed to refresh broker claims")
+
+    async def renew_claims(self):
+        keys = list(self.claims)
+        async with self.client.pipeline(transaction=False) as pipeline:
+            for key in keys:
+                await self._renew_script(keys=[key], args=[self.worker_id, self.claim_ttl], client=pipeline)
+            renewed = await pipeline.execute()
+        for key, is_renewed in zip(keys, renewed):
+            if not is_renewed:
+                # ключ истёк и достался другому воркеру - больше не продлеваем
+                self.claims.discard(key)
+                logger.warning("Lost broker claim %s", key)
+
+    async def send_to_worker(self, worker_id: str, message: dict):
+        await self.client.publish(worker_channel(worker_id), json.dumps(message))
+
+    async def claim(self, key: str) -> str:
+        while True:
+            if await self.client.set(key, self.worker_id, nx=True, ex=self.claim_ttl):
+                self.claims.add(key)
+                return self.worker_id
+            owner = await self.client.get(key)
+            # ключ мог истечь между SET и GET - тогда пробуем ещё раз
+            if owner is not None:
+                if owner == self.worker_id:
+                    self.claims.add(key)
+                return owner
+
+    async def release(self, key: str):
+        self.claims.discard(key)
+        await self._release_script(keys=[key], args=[self.worker_id])
+
+    async def get_owner(self, key: str) -> str | None:
+        return await self.client.get(key)
+
+
+def create_broker() -> MessageBroker:
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    if broker_settings.broker_backend == "redis":
+        return RedisBroker(
+            worker_id=worker_id,
+            url=broker_settings.broker_url,
+            claim_ttl=broker_settings.broker_claim_ttl_seconds,
+        )
+    return InMemoryBroker(worker_id)
+
+broker = create_broker()
@@ -0,0 +1,72 @@
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+class TTLCache(Generic[K, V]):
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.items: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: K) -> V | None:
+        item = self.items.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self.items[key]
+            self.misses += 1
+            return None
+        self.items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def peek(self, key: K) -> V | None:
+        # без учёта в hits/misses и без изменения порядка вытеснения
+        item = self.items.get(key)
+        if item is None or item[0] <= time.monotonic():
+            return None
+        return item[1]
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> list[tuple[K, V]]:
+        # возвращает вытесненные по размеру записи - для тех, кому нужно освободить связанные ресурсы
+        if ttl is None:
+            ttl = self.ttl
+        if ttl <= 0:
+            return []
+        self.items[key] = (time.monotonic() + ttl, value)
+        self.items.move_to_end(key)
+        evicted = []
+        while len(self.items) > self.max_size:
+            evicted_key, (_, evicted_value) = self.items.popitem(last=False)
+            evicted.append((evicted_key, evicted_value))
+        return evicted
+
+    def pop(self, key: K) -> V | None:
+        item = self.items.pop(key, None)
+        return None if item is None else item[1]
+
+    def pop_expired(self) -> list[tuple[K, V]]:
+        now = time.monotonic()
+        expired = [key for key, (expires_at, _) in self.items.items() if expires_at <= now]
+        return [(key, self.items.pop(key)[1]) for key in expired]
+
+    def clear(self):
+        self.items.clear()
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self.items),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,27 @@
+import sys
+
+# Таблица клеток поля считается один раз при импорте: индекс row * BOARD_SIZE + col,
+# координаты хода (x, y) и id клетки ("a1".."j10"). Строки интернированы, поэтому ходы,
+# события и доски ссылаются на одни и те же объекты, а не собирают строку на каждый ход.
+BOARD_SIZE = 10
+
+COLUMN_NAMES: tuple[str, ...] = tuple(sys.intern(chr(ord("a") + col)) for col in range(BOARD_SIZE))
+# буква столбца -> номер столбца; клиент может прислать и заглавную
+COLUMN_INDEXES: dict[str, int] = {
+    **{name: col for col, name in enumerate(COLUMN_NAMES)},
+    **{name.upper(): col for col, name in enumerate(COLUMN_NAMES)},
+}
+
+CELL_IDS: tuple[str, ...] = tuple(
+    sys.intern(COLUMN_NAMES[col] + str(row + 1))
+    for row in range(BOARD_SIZE)
+    for col in range(BOARD_SIZE)
+)
+# id клетки -> индекс; доски, присланные при создании игры, могут быть в верхнем регистре
+CELL_INDEXES: dict[str, int] = {
+    **{cell: index for index, cell in enumerate(CELL_IDS)},
+    **{cell.upper(): index for index, cell in enumerate(CELL_IDS)},
+}
+
+def move_to_index(x: str, y: int) -> int:
+    return (y - 1) * BOARD_SIZE + COLUMN_INDEXES[x]
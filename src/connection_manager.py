@@ -0,0 +1,157 @@
+from fastapi import WebSocket
+from src.schemas import ClientMessage, GameEvent, game_event_adapter
+from src.broker import MessageBroker, broker, player_key
+from src.protocol import Protocol, encode_event, send_frame, receive_move
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ConnectionManager:
+    def __init__(self, broker: MessageBroker):
+        self.broker = broker
+        self.active_connections: dict[int, WebSocket] = {}
+        self.protocols: dict[int, Protocol] = {}
+        # события одному игроку уходят по одному: lock отдаётся в порядке очереди,
+        # поэтому события разных ходов не перемешиваются
+        self.send_locks: dict[int, asyncio.Lock] = {}
+
+    async def connect(
+        self,
+        player_id: int,
+        websocket: WebSocket,
+        protocol: Protocol = Protocol.JSON,
+        subprotocol: str | None = None,
+        ) -> bool:
+        if player_id in self.active_connections:
+            return False
+        # место занимается до await, чтобы второе подключение того же игрока не прошло проверку
+        self.active_connections[player_id] = websocket
+        self.protocols[player_id] = protocol
+        try:
+            # игрок может быть подключён только к одному воркеру
+            if await self.broker.claim(player_key(player_id)) != self.broker.worker_id:
+                del self.active_connections[player_id]
+                del self.protocols[player_id]
+                return False
+            await websocket.accept(subprotocol=subprotocol)
+        except:
+            self.active_connections.pop(player_id, None)
+            self.protocols.pop(player_id, None)
+            await self.broker.release(player_key(player_id))
+            raise
+        return True
+
+    async def disconnect(self, player_id: int) -> bool:
+        try:
+            del self.active_connections[player_id]
+        except KeyError:
+            return False
+        self.protocols.pop(player_id, None)
+        self.send_locks.pop(player_id, None)
+        await self.broker.release(player_key(player_id))
+        return True
+
+    def get_websocket_by_id(self, player_id: int) -> WebSocket | None:
+        if player_id in self.active_connections:
+            return self.active_connections[player_id]
+        else:
+            return None
+
+    def check_player(self, player_id: int) -> bool:
+        if player_id in self.active_connections:
+            return True
+        else:
+            return False
+    
+    async def send_personal_message(self, message: GameEvent, websocket: WebSocket, protocol: Protocol = Protocol.JSON):
+        await send_frame(websocket, encode_event(message, protocol))
+
+    async def send_player_message(self, message: GameEvent, player_id: int):
+        if player_id in self.active_connections:
+            await self.send_personal_message(
+                message=message, 
+                websocket=self.active_connections[player_id], 
+                protocol=self.protocols[player_id],
+                )
+            return
+        await self.send_remote_message(message.model_dump(mode="json"), player_id)
+
+    async def send_remote_message(self, message: dict, player_id: int):
+        await self.send_remote_messages([message], player_id)
+
+    async def send_remote_messages(self, messages: list[dict], player_id: int):
+        # сокет игрока может жить в другом воркере
+        owner = await self.broker.get_owner(player_key(player_id))
+        if owner is not None and owner != self.broker.worker_id:
+            for message in messages:
+                await self.broker.send_to_worker(owner, {
+                    "type": "send",
+                    "player_id": player_id,
+                    "message": message,
+                })
+
+    async def send_player_events(self, player_id: int, events: list[GameEvent], frames: dict[tuple[int, Protocol], str | bytes]):
+        async with self.send_locks.setdefault(player_id, asyncio.Lock()):
+            websocket = self.active_connections.get(player_id)
+            if websocket is None:
+                await self.send_remote_messages([event.model_dump(mode="json") for event in events], player_id)
+                return
+            protocol = self.protocols[player_id]
+            for event in events:
+                key = (id(event), protocol)
+                if key not in frames:
+                    frames[key] = encode_event(event, protocol)
+                await send_frame(websocket, frames[key])
+
+    async def send_events(self, events_by_player: dict[int, list[GameEvent]]):
+        # событие сериализуется один раз на протокол, игрокам события уходят параллельно,
+        # чтобы медленный соперник не задерживал ответ стрелявшему
+        frames: dict[tuple[int, Protocol], str | bytes] = {}
+        results = await asyncio.gather(*(
+            self.send_player_events(player_id, events, frames)
+            for player_id, events in events_by_player.items()
+        ), return_exceptions=True)
+        # ошибка отправки одному игроку не должна прерывать ход другого
+        for player_id, result in zip(events_by_player, results):
+            if isinstance(result, Exception):
+                logger.warning("Failed to send %d events to player %d: %r", len(events_by_player[player_id]), player_id, result)
+
+    async def broadcast(self, message: GameEvent, player_ids: list[int]):
+        await self.send_events({player_id: [message] for player_id in player_ids})
+
+    async def send_message_play_room(self, message: GameEvent, first_player_id: int, second_player_id: int):
+        await self.broadcast(message, [first_player_id, second_player_id])
+
+    async def close_player(self, player_id: int, code: int = 1000):
+        websocket = self.get_websocket_by_id(player_id)
+        if websocket is not None:
+            await websocket.close(code=code, reason=None)
+            return
+        owner = await self.broker.get_owner(player_key(player_id))
+        if owner is not None and owner != self.broker.worker_id:
+            await self.broker.send_to_worker(owner, {
+                "type": "close",
+                "player_id": player_id,
+                "code": code,
+            })
+
+    async def deliver(self, message: dict):
+        # сообщения для локальных сокетов, пришедшие от других воркеров
+        websocket = self.get_websocket_by_id(message["player_id"])
+        if websocket is None:
+            return
+        if message["type"] == "send":
+            await self.send_personal_message(
+                message=game_event_adapter.validate_python(message["message"]),
+                websocket=websocket,
+                protocol=self.protocols[message["player_id"]],
+                )
+        elif message["type"] == "close":
+            await websocket.close(code=message["code"], reason=None)
+
+    async def receive_message(self, websocket: WebSocket, protocol: Protocol = Protocol.JSON) -> ClientMessage | None:
+        return await receive_move(websocket, protocol)
+
+
+manager = ConnectionManager(broker)
@@ -1,14 +1,63 @@
+import asyncio
+import time
 from src.config import db_settings
+from src.metrics import db_statement_duration, db_pool_checkout_wait, statement_label
+from sqlalchemy import event, text
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    # время получения соединения из пула (ожидание свободного или открытие нового);
+    # Engine.connect и сессии берут соединения через публичный Pool.connect
+    def connect(self):
+        started_at = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            db_pool_checkout_wait.observe(time.perf_counter() - started_at)
+
 async_engine = create_async_engine(
     url=db_settings.database_url_asyncpg(),
-    echo=True,
-    pool_size=5,
+    echo=db_settings.db_echo,
+    poolclass=TimedQueuePool,
+    pool_size=db_settings.db_pool_size,
+    max_overflow=db_settings.db_max_overflow,
+    pool_timeout=db_settings.db_pool_timeout_seconds,
+    pool_pre_ping=db_settings.db_pool_pre_ping,
+    pool_recycle=db_settings.db_pool_recycle_seconds,
 )
 
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # время старта живёт в контексте выполнения: при ошибке запроса он просто отбрасывается
+    context.statement_started_at = time.perf_counter()
+
+@event.listens_for(async_engine.sync_engine, "after_cursor_execute")
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    db_statement_duration.observe(time.perf_counter() - context.statement_started_at, statement_label(statement))
+
 async_session = async_sessionmaker(async_engine, expire_on_commit=False)
 
+async def warm_up_pool(connections: int):
+    # соединения открываются одновременно и возвращаются в пул: первые запросы не ждут подключения к БД
+    async def open_connection():
+        async with async_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(open_connection() for _ in range(min(connections, db_settings.db_pool_size))))
+
+def pool_stats() -> dict[str, int]:
+    pool = async_engine.pool
+    return {
+        "size": pool.size(),
+        "max_overflow": db_settings.db_max_overflow,
+        "connections": pool.checkedin() + pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        # у QueuePool overflow отрицателен, пока не открыто pool_size соединений
+        "overflow": max(pool.overflow(), 0),
+    }
+
 async def get_async_session() -> AsyncSession:
     async with async_session() as session:
         yield session
\ No newline at end of file
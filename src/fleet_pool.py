@@ -0,0 +1,116 @@
+import asyncio
+import logging
+from collections import deque
+from typing import NamedTuple
+from src.config import game_settings
+from src.game_board import generate_fleet
+from src.schemas import GameBoardPublic
+
+logger = logging.getLogger(__name__)
+
+# пауза перед повторным пополнением после ошибки генерации
+REFILL_RETRY_SECONDS = 1.0
+
+class PooledFleet(NamedTuple):
+    # доска для ответа клиенту и уже закодированная строка для БД (BitBoard.to_bytes)
+    public: GameBoardPublic
+    data: bytes
+
+def generate_pooled_fleet() -> PooledFleet:
+    fleet = generate_fleet()
+    return PooledFleet(fleet.to_public(), fleet.to_bytes())
+
+def generate_pooled_fleets(n: int) -> list[PooledFleet]:
+    return [generate_pooled_fleet() for _ in range(n)]
+
+class FleetPool:
+    def __init__(self, max_size: int, low_water_mark: int, refill_batch_size: int):
+        self.max_size = max_size
+        self.low_water_mark = low_water_mark
+        self.refill_batch_size = refill_batch_size
+        self.fleets: deque[PooledFleet] = deque(maxlen=max_size)
+
+        self.hits = 0
+        self.misses = 0
+        self.refills = 0
+        self.generated = 0
+        self.failed_refills = 0
+
+        self._refill_needed = asyncio.Event()
+        self._filled = asyncio.Event()
+        self._refill_task: asyncio.Task | None = None
+
+    async def start(self):
+        if self._refill_task is None:
+            self._refill_task = asyncio.create_task(self._refill_loop())
+            self._refill_needed.set()
+
+    async def stop(self):
+        if self._refill_task is not None:
+            self._refill_task.cancel()
+            try:
+                await self._refill_task
+            except asyncio.CancelledError:
+                pass
+            self._refill_task = None
+
+    async def _refill_loop(self):
+        while True:
+            await self._refill_needed.wait()
+            self._refill_needed.clear()
+            try:
+                await self._refill()
+            except Exception:
+                # pop генерирует флот сам, пока пул пуст; прогрев не ждёт пул, который не заполняется
+                self.failed_refills += 1
+                logger.exception("Failed to refill the fleet pool")
+                self._filled.set()
+                await asyncio.sleep(REFILL_RETRY_SECONDS)
+                self._refill_needed.set()
+
+    async def _refill(self):
+        while len(self.fleets) < self.max_size:
+            count = min(self.refill_batch_size, self.max_size - len(self.fleets))
+            # генерация в отдельном потоке, чтобы не блокировать event loop
+            fleets = await asyncio.to_thread(generate_pooled_fleets, count)
+            self.fleets.extend(fleets)
+            self.generated += count
+        self.refills += 1
+        self._filled.set()
+
+    async def wait_filled(self):
+        # первое заполнение пула после start
+        await self._filled.wait()
+
+    def pop(self) -> PooledFleet:
+        try:
+            fleet = self.fleets.popleft()
+            self.hits += 1
+        except IndexError:
+            fleet = generate_pooled_fleet()
+            self.misses += 1
+        if len(self.fleets) < self.low_water_mark:
+            self._refill_needed.set()
+        return fleet
+
+    def pop_many(self, n: int) -> list[PooledFleet]:
+        return [self.pop() for _ in range(n)]
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self.fleets),
+            "max_size": self.max_size,
+            "low_water_mark": self.low_water_mark,
+            "hits": self.hits,
+            "misses": self.misses,
+            "refills": self.refills,
+            "generated": self.generated,
+            "failed_refills": self.failed_refills,
+        }
+
+
+fleet_pool = FleetPool(
+    max_size=game_settings.fleet_pool_size,
+    low_water_mark=game_settings.fleet_pool_low_water_mark,
+    refill_batch_size=game_settings.fleet_pool_refill_batch_size,
+)
@@ -1,32 +1,35 @@
 import random
 from enum import Enum
-from src.schemas import ShipPublic, GameBoardPublic, ShipType
-
-BOARD_SIZE = 10
+from src.cells import BOARD_SIZE, CELL_IDS, CELL_INDEXES
+from src.schemas import ShipPublic, GameBoardPublic, GameBoardBase, ShipType
 
 HORIZONTAL = 0
+VERTICAL = 1
 
-class HorizontalNameCell(Enum):
-    A = 0
-    B = 1
-    C = 2
-    D = 3
-    E = 4
-    F = 5
-    G = 6
-    H = 7
-    I = 8
-    J = 9
+def generate_cell_id(row: int, col: int) -> str:
+    if not (0 <= row < BOARD_SIZE and 0 <= col < BOARD_SIZE):
+        raise ValueError(f"The cell ({row}, {col}) is not on the board")
+    return CELL_IDS[cell_index(row, col)]
 
-    @classmethod
-    def get_name(cls, value: int) -> str:
-        try:
-            return cls(value).name.lower()
-        except ValueError:
-            raise ValueError(f"The value {value} does not correspond to any element of the enumeration {cls.__name__}")
+def cell_index(row: int, col: int) -> int:
+    return row * BOARD_SIZE + col
 
-def generate_cell_id(row: int, col: int) -> str:
-    return HorizontalNameCell.get_name(col) + str(row + 1)
+def cell_id_to_index(cell: str) -> int:
+    try:
+        return CELL_INDEXES[cell]
+    except KeyError:
+        raise ValueError(f"The cell \"{cell}\" is not on the board")
+
+def index_to_cell_id(index: int) -> str:
+    return CELL_IDS[index]
+
+def mask_to_indexes(mask: int) -> list[int]:
+    indexes = []
+    while mask:
+        low_bit = mask & -mask
+        indexes.append(low_bit.bit_length() - 1)
+        mask ^= low_bit
+    return indexes
 
 SHIP_SIZES = [(ShipType.CRUISER, 4), 
     (ShipType.BATTLESHIP, 3), 
@@ -39,96 +42,184 @@ SHIP_SIZES = [(ShipType.CRUISER, 4),
     (ShipType.SPEEDBOAT, 1),
     (ShipType.SPEEDBOAT, 1),]
 
-def generate_board() -> GameBoardPublic:
-    board = [[0 for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
-    # ships_positions: set[string] = set()
-    game_board = GameBoardPublic(ships=[])
-
-    def can_place_ship(row, col, ship_size, orientation) -> bool:
-        if orientation == HORIZONTAL: 
-            if col + ship_size > BOARD_SIZE:
-                return False
-            for i in range(ship_size):
-                if board[row][col + i] != 0:
-                    return False
-            # сверху
-            if row > 0 and board[row - 1][col:col + ship_size] != [0] * ship_size:
-                return False
-            # снизу
-            elif row < BOARD_SIZE - 1 and board[row + 1][col:col + ship_size] != [0] * ship_size:
-                return False
-            # слева
-            elif col > 0 and board[row][col - 1] != 0:
-                return False
-            # справа
-            elif col + ship_size < BOARD_SIZE and board[row][col + ship_size] != 0:
-                return False
-            # сверху слева
-            elif col > 0 and row > 0 and board[row - 1][col - 1] != 0:
-                return False
-            # снизу слева
-            elif col > 0 and row < BOARD_SIZE - 1 and board[row + 1][col - 1] != 0:
-                return False
-            # сверху справа
-            elif col + ship_size < BOARD_SIZE and row > 0 and board[row - 1][col + ship_size] != 0:
-                return False
-            # снизу справа
-            elif col + ship_size < BOARD_SIZE and row < BOARD_SIZE - 1 and board[row + 1][col + ship_size] != 0:
-                return False
+def ship_mask(row: int, col: int, ship_size: int, orientation: int) -> int:
+    mask = 0
+    for i in range(ship_size):
+        if orientation == HORIZONTAL:
+            mask |= 1 << cell_index(row, col + i)
+        else:
+            mask |= 1 << cell_index(row + i, col)
+    return mask
 
+def zone_mask(row: int, col: int, ship_size: int, orientation: int) -> int:
+    # сам корабль и все соседние клетки, включая диагональные
+    if orientation == HORIZONTAL:
+        last_row, last_col = row, col + ship_size - 1
+    else:
+        last_row, last_col = row + ship_size - 1, col
+    mask = 0
+    for zone_row in range(max(row - 1, 0), min(last_row + 1, BOARD_SIZE - 1) + 1):
+        for zone_col in range(max(col - 1, 0), min(last_col + 1, BOARD_SIZE - 1) + 1):
+            mask |= 1 << cell_index(zone_row, zone_col)
+    return mask
+
+def build_placements(ship_size: int) -> list[tuple[int, int]]:
+    # все допустимые положения корабля на пустом поле: (маска корабля, запретная зона)
+    placements = []
+    orientations = [HORIZONTAL] if ship_size == 1 else [HORIZONTAL, VERTICAL]
+    for orientation in orientations:
+        max_row = BOARD_SIZE - (ship_size if orientation == VERTICAL else 1)
+        max_col = BOARD_SIZE - (ship_size if orientation == HORIZONTAL else 1)
+        for row in range(max_row + 1):
+            for col in range(max_col + 1):
+                placements.append((
+                    ship_mask(row, col, ship_size, orientation),
+                    zone_mask(row, col, ship_size, orientation),
+                ))
+    return placements
+
+PLACEMENTS: dict[int, list[tuple[int, int]]] = {
+    ship_size: build_placements(ship_size) for ship_size in {size for _, size in SHIP_SIZES}
+}
+
+def generate_fleet() -> "BitBoard":
+    while True:
+        bit_board = BitBoard()
+        forbidden_mask = 0
+        legal_placements: list[tuple[int, int]] = []
+        previous_ship_size = None
+        for ship_type, ship_size in SHIP_SIZES:
+            # запретная зона только растёт, поэтому для кораблей того же размера
+            # достаточно отфильтровать уже найденные положения
+            if ship_size != previous_ship_size:
+                legal_placements = PLACEMENTS[ship_size]
+                previous_ship_size = ship_size
+            legal_placements = [
+                placement for placement in legal_placements
+                if not forbidden_mask & placement[0]
+            ]
+            # при неудачной расстановке больших кораблей места может не остаться - начинаем заново
+            if not legal_placements:
+                break
+            placement, zone = random.choice(legal_placements)
+            forbidden_mask |= zone
+            bit_board.add_ship(ship_type.value, placement)
         else:
-            if row + ship_size > BOARD_SIZE:
-                return False
-            for i in range(ship_size):
-                if board[row + i][col] != 0:
-                    return False
-            # сверху
-            if row > 0 and board[row - 1][col] != 0:
-                return False
-            # снизу
-            elif row + ship_size < BOARD_SIZE and board[row + ship_size][col] != 0:
-                return False
-            # слева
-            elif col > 0 and [board[row + i][col - 1] for i in range(ship_size)] != [0] * ship_size:
-                return False
-            # справа
-            elif col < BOARD_SIZE - 1 and [board[row + i][col + 1] for i in range(ship_size)] != [0] * ship_size:
-                return False
-            # сверху слева
-            elif row > 0 and col > 0 and row > 0 and board[row - 1][col - 1] != 0:
-                return False
-            # снизу слева
-            elif row + ship_size < BOARD_SIZE and col > 0 and board[row + ship_size][col - 1] != 0:
-                return False
-            # сверху справа
-            elif row > 0 and col < BOARD_SIZE - 1 and row > 0 and board[row - 1][col + 1] != 0:
-                return False
-            # снизу справа
-            elif row + ship_size < BOARD_SIZE and col < BOARD_SIZE - 1 and row < BOARD_SIZE - 1 and board[row + ship_size][col + 1] != 0:
-                return False
-
-        return True
-
-    for ship_size in SHIP_SIZES:
-        placed = False
-        while not placed:
-            orientation = random.choice([0, 1])  # 0 - горизонтально, 1 - вертикально
-            row = random.randint(0, BOARD_SIZE - 1)
-            col = random.randint(0, BOARD_SIZE - 1)
-            
-            if can_place_ship(row, col, ship_size[1], orientation):
-                ship = ShipPublic(name=ship_size[0].value, location = [])
-
-                if orientation == HORIZONTAL:
-                    for i in range(ship_size[1]):
-                        board[row][col + i] = 1
-                        ship.location.append(generate_cell_id(row, col + i))
-                else:
-                    for i in range(ship_size[1]):
-                        board[row + i][col] = 1
-                        ship.location.append(generate_cell_id(row + i, col))
-
-                placed = True
-                game_board.ships.append(ship)
-
-    return game_board
\ No newline at end of file
+            return bit_board
+
+def generate_board() -> GameBoardPublic:
+    return generate_fleet().to_public()
+
+class ShotResult(Enum):
+    ALREADY_CHECKED = 0
+    MISS = 1
+    HIT = 2
+    SUNK = 3
+    WIN = 4
+
+NO_SHIP = 0xFF
+
+# Доска в БД: версия формата, число кораблей, по каждому из MAX_SHIPS кораблей
+# код типа и маска оставшихся клеток, затем маска выстрелов. Размер всегда BOARD_BYTES.
+BOARD_FORMAT_VERSION = 1
+MAX_SHIPS = len(SHIP_SIZES)
+MASK_BYTES = (BOARD_SIZE * BOARD_SIZE + 7) // 8
+SHIP_RECORD_BYTES = 1 + MASK_BYTES
+BOARD_BYTES = 2 + MAX_SHIPS * SHIP_RECORD_BYTES + MASK_BYTES
+SHIP_TYPES = list(ShipType)
+SHIP_TYPE_CODES = {ship_type.value: code for code, ship_type in enumerate(SHIP_TYPES)}
+
+class BitBoard:
+    # Клетка с индексом row * BOARD_SIZE + col соответствует биту с тем же номером.
+    # ship_masks хранят только ещё не подбитые клетки каждого корабля.
+    __slots__ = ("ship_names", "ship_masks", "fleet_mask", "shots_mask", "cell_ship")
+
+    def __init__(self):
+        self.ship_names: list[str] = []
+        self.ship_masks: list[int] = []
+        self.fleet_mask = 0
+        self.shots_mask = 0
+        self.cell_ship = bytearray([NO_SHIP]) * (BOARD_SIZE * BOARD_SIZE)
+
+    def add_ship(self, name: str, mask: int):
+        ship_index = len(self.ship_masks)
+        self.ship_names.append(name)
+        self.ship_masks.append(mask)
+        self.fleet_mask |= mask
+        for index in mask_to_indexes(mask):
+            self.cell_ship[index] = ship_index
+
+    @classmethod
+    def from_public(cls, board: GameBoardBase) -> "BitBoard":
+        bit_board = cls()
+        for ship in board.ships:
+            mask = 0
+            for cell in ship.location:
+                mask |= 1 << cell_id_to_index(cell)
+            bit_board.add_ship(ship.name, mask)
+        for cell in getattr(board, "checked_cells", None) or []:
+            bit_board.shots_mask |= 1 << cell_id_to_index(cell)
+        return bit_board
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BitBoard":
+        if len(data) != BOARD_BYTES or data[0] != BOARD_FORMAT_VERSION:
+            raise ValueError(f"Unsupported board format ({len(data)} bytes)")
+        bit_board = cls()
+        offset = 2
+        for _ in range(data[1]):
+            bit_board.add_ship(
+                SHIP_TYPES[data[offset]].value,
+                int.from_bytes(data[offset + 1:offset + SHIP_RECORD_BYTES], "big"),
+            )
+            offset += SHIP_RECORD_BYTES
+        bit_board.shots_mask = int.from_bytes(data[-MASK_BYTES:], "big")
+        return bit_board
+
+    @staticmethod
+    def count_shots(data: bytes) -> int:
+        # число выстрелов по сохранённой доске без разбора кораблей
+        return int.from_bytes(data[-MASK_BYTES:], "big").bit_count()
+
+    def to_bytes(self) -> bytes:
+        data = bytearray((BOARD_FORMAT_VERSION, len(self.ship_masks)))
+        for name, mask in zip(self.ship_names, self.ship_masks):
+            data.append(SHIP_TYPE_CODES[name])
+            data += mask.to_bytes(MASK_BYTES, "big")
+        data += bytes((MAX_SHIPS - len(self.ship_masks)) * SHIP_RECORD_BYTES)
+        data += self.shots_mask.to_bytes(MASK_BYTES, "big")
+        return bytes(data)
+
+    def to_public(self) -> GameBoardPublic:
+        return GameBoardPublic(ships=[
+            ShipPublic(name=name, location=[index_to_cell_id(index) for index in mask_to_indexes(mask)])
+            for name, mask in zip(self.ship_names, self.ship_masks)
+            if mask
+        ])
+
+    def checked_cells(self) -> list[str]:
+        return [index_to_cell_id(index) for index in mask_to_indexes(self.shots_mask)]
+
+    def is_checked(self, index: int) -> bool:
+        return bool(self.shots_mask >> index & 1)
+
+    def all_sunk(self) -> bool:
+        return self.fleet_mask == 0
+
+    def shoot(self, index: int) -> ShotResult:
+        bit = 1 << index
+        if self.shots_mask & bit:
+            return ShotResult.ALREADY_CHECKED
+        self.shots_mask |= bit
+
+        if not self.fleet_mask & bit:
+            return ShotResult.MISS
+
+        ship_index = self.cell_ship[index]
+        self.ship_masks[ship_index] &= ~bit
+        self.fleet_mask &= ~bit
+        if self.ship_masks[ship_index]:
+            return ShotResult.HIT
+        if self.fleet_mask == 0:
+            return ShotResult.WIN
+        return ShotResult.SUNK
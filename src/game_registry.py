@@ -0,0 +1,281 @@
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from sqlmodel import update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.models import Game, GameBoard, Move, PlayerStats
+from src.schemas import GameResult, FINISHED_GAME_RESULTS, MoveOutcome
+from src.game_board import BitBoard, ShotResult, cell_id_to_index
+from src.move_log import move_log
+from src.metrics import moves_total
+from src.cache import TTLCache
+from src.config import game_settings
+
+SHOT_OUTCOMES = {
+    ShotResult.MISS: MoveOutcome.MISS,
+    ShotResult.HIT: MoveOutcome.HIT,
+    ShotResult.SUNK: MoveOutcome.SUNK,
+    ShotResult.WIN: MoveOutcome.WIN,
+}
+
+# INSERT ... ON CONFLICT DO UPDATE есть только в диалектных insert
+UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+class ActiveGame:
+    def __init__(self, game: Game, moves: list[Move] | None = None):
+        self.game = game
+        self.boards: dict[int, BitBoard] = {
+            board.player_id: BitBoard.from_bytes(board.board)
+            for board in game.players_lived_board
+        }
+        self.board_ids: dict[int, int] = {board.player_id: board.id for board in game.players_lived_board}
+        # доски в БД - контрольная точка: каждый принятый ход - ровно один новый выстрел,
+        # поэтому ходы с seq меньше числа выстрелов уже учтены в досках, moves - только ходы после неё
+        self.moves_by_player: dict[int, int] = {
+            self.opponent(target_id)[0]: board.shots_mask.bit_count()
+            for target_id, board in self.boards.items()
+        }
+        self.next_move_seq = sum(self.moves_by_player.values())
+        self.connected_players: set[int] = set()
+
+        # все ходы и подключения/отключения игры выполняются под этим lock
+        self.lock = asyncio.Lock()
+        self.lock_waits = 0
+        self.lock_wait_total = 0.0
+        self.lock_wait_max = 0.0
+
+        for move in moves or []:
+            self.replay_move(move)
+        if game.next_step_player_name is None:
+            game.next_step_player_name = random.choice([game.player1_name, game.player2_name])
+
+    @property
+    def sid(self) -> int:
+        return self.game.sid
+
+    @property
+    def player_ids(self) -> tuple[int, int]:
+        return self.game.player1_id, self.game.player2_id
+
+    @asynccontextmanager
+    async def locked(self):
+        wait_started_at = time.perf_counter()
+        async with self.lock:
+            wait_time = time.perf_counter() - wait_started_at
+            self.lock_waits += 1
+            self.lock_wait_total += wait_time
+            self.lock_wait_max = max(self.lock_wait_max, wait_time)
+            yield self
+
+    def get_board(self, player_id: int) -> BitBoard | None:
+        return self.boards.get(player_id)
+
+    def player_name(self, player_id: int) -> str:
+        if player_id == self.game.player1_id:
+            return self.game.player1_name
+        return self.game.player2_name
+
+    def next_step_player_id(self) -> int:
+        if self.game.next_step_player_name == self.game.player1_name:
+            return self.game.player1_id
+        return self.game.player2_id
+
+    def opponent(self, player_id: int) -> tuple[int, str]:
+        if player_id == self.game.player1_id:
+            return self.game.player2_id, self.game.player2_name
+        return self.game.player1_id, self.game.player1_name
+
+    def replay_move(self, move: Move):
+        # доска в памяти = корабли из БД + все ходы из журнала
+        game = self.game
+        if move.shooter_id == game.player1_id:
+            target_id, shooter_name, target_name = game.player2_id, game.player1_name, game.player2_name
+        else:
+            target_id, shooter_name, target_name = game.player1_id, game.player2_name, game.player1_name
+        board = self.get_board(target_id)
+        if board is not None:
+            board.shoot(cell_id_to_index(move.cell))
+        if move.outcome == MoveOutcome.MISS.value:
+            game.next_step_player_name = target_name
+        else:
+            game.next_step_player_name = shooter_name
+        self.next_move_seq = move.seq + 1
+        self.moves_by_player[move.shooter_id] = self.moves_by_player.get(move.shooter_id, 0) + 1
+
+    def record_move(self, shooter_id: int, cell: str, shot: ShotResult):
+        seq = self.next_move_seq
+        self.next_move_seq = seq + 1
+        self.moves_by_player[shooter_id] = self.moves_by_player.get(shooter_id, 0) + 1
+        move_log.record(
+            game_sid=self.sid,
+            seq=seq,
+            shooter_id=shooter_id,
+            cell=cell,
+            outcome=SHOT_OUTCOMES[shot].value,
+        )
+        moves_total.inc(SHOT_OUTCOMES[shot].value)
+
+    def set_result(self, winner_id: int):
+        self.game.end_date = datetime.now()
+        if winner_id == self.game.player1_id:
+            self.game.result = GameResult.PLAYER_1_WIN.value
+        else:
+            self.game.result = GameResult.PLAYER_2_WIN.value
+
+    async def save(self, async_session: AsyncSession):
+        # журнал ходов должен попасть в БД раньше, чем игра будет выгружена из памяти;
+        # ошибка записи ходов других игр сохранению этой игры не мешает
+        try:
+            await move_log.flush()
+        except Exception:
+            if move_log.has_pending(self.sid):
+                raise
+        # завершённая игра больше не меняется: повторное сохранение ничего не обновит,
+        # и статистика игроков увеличится ровно один раз
+        saved = await async_session.execute(
+            update(Game).where(
+                Game.sid == self.sid,
+                Game.result.not_in(FINISHED_GAME_RESULTS),
+            ).values(
+                result=self.game.result,
+                end_date=self.game.end_date,
+                next_step_player_name=self.game.next_step_player_name,
+            )
+        )
+        if saved.rowcount:
+            # выстрелы сохраняются в доски, и следующая загрузка повторит только ходы после этого
+            await async_session.execute(update(GameBoard), [
+                {"id": board_id, "board": self.boards[player_id].to_bytes()}
+                for player_id, board_id in self.board_ids.items()
+            ])
+            if self.game.result in FINISHED_GAME_RESULTS:
+                await self.update_player_stats(async_session)
+        await async_session.commit()
+
+    async def update_player_stats(self, async_session: AsyncSession):
+        if self.game.result == GameResult.PLAYER_1_WIN.value:
+            winner_id, loser_id = self.game.player1_id, self.game.player2_id
+        else:
+            winner_id, loser_id = self.game.player2_id, self.game.player1_id
+        # строки может не быть (игрок зарегистрирован до миграции или регистрация оборвалась) - upsert
+        insert = UPSERT_INSERTS[async_session.get_bind().dialect.name]
+        statement = insert(PlayerStats).values([
+            {
+                "player_id": player_id,
+                "games_played": 1,
+                "wins": int(won),
+                "losses": int(not won),
+                "total_moves": self.moves_by_player.get(player_id, 0),
+                "logged_games": 1,
+            }
+            for player_id, won in ((winner_id, True), (loser_id, False))
+        ])
+        await async_session.execute(statement.on_conflict_do_update(
+            index_elements=[PlayerStats.player_id],
+            set_={
+                name: getattr(PlayerStats, name) + getattr(statement.excluded, name)
+                for name in ("games_played", "wins", "losses", "total_moves", "logged_games")
+            },
+        ))
+
+class GameRegistry:
+    def __init__(self, snapshot_ttl: float, snapshot_max_size: int):
+        self.games: dict[int, ActiveGame] = {}
+        # игры, из которых вышли оба игрока: уже сохранены в БД, но остаются в памяти,
+        # чтобы переподключение в течение snapshot_ttl продолжило игру без чтения из БД
+        self.snapshots: TTLCache[int, ActiveGame] = TTLCache(
+            max_size=snapshot_max_size,
+            ttl=snapshot_ttl,
+        )
+
+        self.expired_snapshots = 0
+
+        # счётчики уже выгруженных игр, чтобы статистика не обнулялась
+        self.finished_lock_waits = 0
+        self.finished_lock_wait_total = 0.0
+        self.finished_lock_wait_max = 0.0
+
+    def add_game(self, game: Game, moves: list[Move] | None = None) -> ActiveGame:
+        active_game = self.games.get(game.sid)
+        if active_game is None:
+            active_game = ActiveGame(game, moves)
+            self.activate_game(active_game)
+        return active_game
+
+    def activate_game(self, active_game: ActiveGame):
+        self.snapshots.pop(active_game.sid)
+        if active_game.sid in self.games:
+            return
+        self.games[active_game.sid] = active_game
+
+    def get_game(self, game_sid: int) -> ActiveGame | None:
+        return self.games.get(game_sid)
+
+    def peek_game(self, game_sid: int) -> ActiveGame | None:
+        return self.games.get(game_sid) or self.snapshots.peek(game_sid)
+
+    def restore_game(self, game_sid: int) -> ActiveGame | None:
+        active_game = self.snapshots.get(game_sid)
+        if active_game is not None:
+            self.activate_game(active_game)
+        return active_game
+
+    def park_game(self, game_sid: int) -> list[int]:
+        # возвращает sid игр, вытесненных из снимков по размеру или времени
+        active_game = self.games.get(game_sid)
+        if active_game is None:
+            return []
+        self.delete_game(game_sid)
+        # время ожидания lock уже учтено в delete_game
+        active_game.lock_waits = 0
+        active_game.lock_wait_total = 0.0
+        active_game.lock_wait_max = 0.0
+        evicted = self.snapshots.pop_expired() + self.snapshots.set(game_sid, active_game)
+        evicted_sids = [evicted_sid for evicted_sid, _ in evicted]
+        if self.snapshots.peek(game_sid) is None and game_sid not in evicted_sids:
+            # снимки выключены (нулевой TTL) - игра выгружается сразу
+            evicted_sids.append(game_sid)
+        return evicted_sids
+
+    def pop_expired_snapshots(self) -> list[int]:
+        expired_sids = [game_sid for game_sid, _ in self.snapshots.pop_expired()]
+        self.expired_snapshots += len(expired_sids)
+        return expired_sids
+
+    def delete_game(self, game_sid: int):
+        active_game = self.games.pop(game_sid, None)
+        if active_game is None:
+            return
+        self.finished_lock_waits += active_game.lock_waits
+        self.finished_lock_wait_total += active_game.lock_wait_total
+        self.finished_lock_wait_max = max(self.finished_lock_wait_max, active_game.lock_wait_max)
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "active_games": len(self.games),
+            "snapshots": len(self.snapshots),
+            "snapshot_hits": self.snapshots.hits,
+            "snapshot_misses": self.snapshots.misses,
+            "expired_snapshots": self.expired_snapshots,
+            "lock_waits": self.finished_lock_waits + sum(
+                game.lock_waits for game in self.games.values()
+            ),
+            "lock_wait_total": self.finished_lock_wait_total + sum(
+                game.lock_wait_total for game in self.games.values()
+            ),
+            "lock_wait_max": max(
+                [self.finished_lock_wait_max] + [game.lock_wait_max for game in self.games.values()]
+            ),
+        }
+
+
+game_registry = GameRegistry(
+    snapshot_ttl=game_settings.game_snapshot_ttl_seconds,
+    snapshot_max_size=game_settings.game_snapshot_max_size,
+)
@@ -0,0 +1,90 @@
+from src.cells import CELL_IDS
+from src.game_board import BitBoard, ShotResult
+from src.schemas import (
+    GameEvent, ErrorEvent, PausedEvent, TurnEvent, AlreadyCheckedEvent, MoveEvent, MissEvent,
+    HitEvent, SunkEvent, WinEvent,
+)
+
+class MoveResolution:
+    __slots__ = ("shot", "cell", "events", "next_step_player_name")
+
+    def __init__(self, shot: ShotResult | None, cell: str | None, events: list[GameEvent], next_step_player_name: str):
+        # shot is None - ход отклонён до выстрела (игра окончена, пауза или чужой ход)
+        self.shot = shot
+        self.cell = cell
+        self.events = events
+        self.next_step_player_name = next_step_player_name
+
+    @property
+    def accepted(self) -> bool:
+        # принятый ход рассылается обоим игрокам, отклонённый - только стрелявшему
+        return self.shot is not None and self.shot != ShotResult.ALREADY_CHECKED
+
+# чистая логика хода: без сокетов, БД и lock, меняет только доску соперника
+def resolve_move(
+    *,
+    target_board: BitBoard,
+    cell_index: int,
+    player_id: int,
+    player_name: str,
+    player2_id: int,
+    player2_name: str,
+    next_step_player_name: str,
+    player2_connected: bool,
+    game_finished: bool,
+    ) -> MoveResolution:
+    if game_finished:
+        return MoveResolution(None, None, [ErrorEvent(
+            message="Game is already finished",
+            player_id=player_id,
+            )], next_step_player_name)
+    if not player2_connected:
+        return MoveResolution(None, None, [PausedEvent(
+            message="Game Paused. Second player is disconnected",
+            player_id=player2_id,
+            )], next_step_player_name)
+    if next_step_player_name != player_name:
+        return MoveResolution(None, None, [TurnEvent(
+            message=f"It's \"{next_step_player_name}\" turn to walk now",
+            player_id=player2_id,
+            )], next_step_player_name)
+
+    cell = CELL_IDS[cell_index]
+    shot = target_board.shoot(cell_index)
+    if shot == ShotResult.ALREADY_CHECKED:
+        return MoveResolution(shot, cell, [AlreadyCheckedEvent(
+            message=f"Cell \"{cell}\" already checked.",
+            player_id=player_id,
+            cell=cell,
+            )], next_step_player_name)
+
+    events: list[GameEvent] = [MoveEvent(
+        message=f"{player_name} has made a move on \"{cell}\"",
+        player_id=player_id,
+        cell=cell,
+        )]
+    if shot == ShotResult.MISS:
+        events.append(MissEvent(
+            message=f"{player_name} miss. Next step is {player2_name}.",
+            player_id=player2_id,
+            cell=cell,
+            ))
+        next_step_player_name = player2_name
+    elif shot == ShotResult.HIT:
+        events.append(HitEvent(
+            message=f"{player_name} hit ship. Next step is {player_name}.",
+            player_id=player_id,
+            cell=cell,
+            ))
+    else:
+        events.append(SunkEvent(
+            message=f"{player_name} kill ship. Next step is {player_name}.",
+            player_id=player_id,
+            cell=cell,
+            ))
+        if shot == ShotResult.WIN:
+            events.append(WinEvent(
+                message=f"{player_name} win.",
+                player_id=player_id,
+                ))
+    return MoveResolution(shot, cell, events, next_step_player_name)
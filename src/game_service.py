@@ -0,0 +1,292 @@
+import asyncio
+import logging
+from fastapi import status
+from sqlmodel import select, and_
+from sqlalchemy.orm import joinedload
+from src import database
+from src.broker import broker, game_key
+from src.connection_manager import manager
+from src.game_registry import ActiveGame, game_registry
+from src.game_board import BitBoard, ShotResult
+from src.game_rules import resolve_move
+from src.models import Game, Move
+from src.schemas import ClientMessage, GameResult, FINISHED_GAME_RESULTS, ConnectedEvent, DisconnectedEvent, StartEvent, ResumedEvent, ErrorEvent
+from src.config import game_settings
+
+logger = logging.getLogger(__name__)
+
+def select_not_ended_game(game_sid: int):
+    return select(Game).where(
+        Game.sid == game_sid,
+        and_(
+            Game.result != GameResult.PLAYER_1_WIN.value,
+            Game.result != GameResult.PLAYER_2_WIN.value,
+        )
+    )
+
+def select_game_with_boards(game_sid: int):
+    # доска целиком хранится в одной строке: игра с двумя досками - две строки
+    return select_not_ended_game(game_sid).options(
+        joinedload(Game.players_lived_board),
+    )
+
+async def find_game(game_sid: int) -> Game | None:
+    # игра в памяти воркера (идущая или недавно покинутая) проверяется без запроса к БД
+    active_game = game_registry.peek_game(game_sid)
+    if active_game is not None:
+        if active_game.game.result in FINISHED_GAME_RESULTS:
+            return None
+        return active_game.game
+    async with database.async_session() as async_session:
+        game_db = await async_session.execute(select_not_ended_game(game_sid))
+        return game_db.scalars().first()
+
+async def load_game(game_sid: int) -> ActiveGame | None:
+    active_game = game_registry.get_game(game_sid) or game_registry.restore_game(game_sid)
+    if active_game is not None:
+        return active_game
+
+    async with database.async_session() as async_session:
+        game_db = await async_session.execute(select_game_with_boards(game_sid))
+        game_db = game_db.unique().scalars().first()
+        if game_db is None:
+            return None
+        # ходы до контрольной точки уже есть в досках
+        checkpoint = sum(BitBoard.count_shots(board.board) for board in game_db.players_lived_board)
+        moves = await async_session.execute(
+            select(Move).where(Move.game_sid == game_sid, Move.seq >= checkpoint).order_by(Move.seq)
+        )
+        moves = moves.scalars().all()
+
+    # пока шёл запрос, игру мог загрузить второй игрок - add_game вернёт уже загруженную
+    return game_registry.add_game(game_db, moves)
+
+async def join_game(active_game: ActiveGame, player_id: int):
+    game = active_game.game
+    player_name = active_game.player_name(player_id)
+    player2_id, player2_name = active_game.opponent(player_id)
+
+    async with active_game.locked():
+        # пока ждали lock, последний игрок мог выйти и игра ушла в снимки
+        game_registry.activate_game(active_game)
+        active_game.connected_players.add(player_id)
+
+        await manager.send_message_play_room(
+            message=ConnectedEvent(
+                message=f"Player \"{player_name}\" is connected",
+                player_id=player_id,
+                ),
+            first_player_id=player_id,
+            second_player_id=player2_id,
+            )
+
+        if player2_id in active_game.connected_players:
+            if game.result == GameResult.NOT_STARTED.value:
+                await manager.send_message_play_room(
+                    message=StartEvent(
+                        message=f"Start Game. Next step is \"{game.next_step_player_name}\"",
+                        player_id=active_game.next_step_player_id(),
+                        ),
+                    first_player_id=player_id,
+                    second_player_id=player2_id,
+                    )
+                game.result = GameResult.NOT_ENDED.value
+            else:
+                await manager.send_message_play_room(
+                    message=ResumedEvent(
+                        message=f"Game Continued. Next step is \"{game.next_step_player_name}\"",
+                        player_id=active_game.next_step_player_id(),
+                        ),
+                    first_player_id=player_id,
+                    second_player_id=player2_id,
+                    )
+
+async def play_move(active_game: ActiveGame, player_id: int, data: ClientMessage):
+    game = active_game.game
+    player_name = active_game.player_name(player_id)
+    player2_id, player2_name = active_game.opponent(player_id)
+
+    async with active_game.locked():
+        resolution = resolve_move(
+            target_board=active_game.get_board(player2_id),
+            cell_index=data.cell_index,
+            player_id=player_id,
+            player_name=player_name,
+            player2_id=player2_id,
+            player2_name=player2_name,
+            next_step_player_name=game.next_step_player_name,
+            player2_connected=player2_id in active_game.connected_players,
+            game_finished=game.result in FINISHED_GAME_RESULTS,
+            )
+        if resolution.accepted:
+            active_game.record_move(player_id, resolution.cell, resolution.shot)
+            game.next_step_player_name = resolution.next_step_player_name
+            outgoing = {player_id: resolution.events, player2_id: resolution.events}
+        else:
+            outgoing = {player_id: resolution.events}
+        # отправка идёт уже без lock игры; задача создаётся под lock, поэтому
+        # события следующего хода встанут в очередь к игроку после событий этого
+        sending = asyncio.create_task(manager.send_events(outgoing))
+
+        if resolution.shot == ShotResult.WIN:
+            active_game.set_result(player_id)
+            async with database.async_session() as async_session:
+                await active_game.save(async_session)
+
+    await sending
+    if resolution.shot == ShotResult.WIN:
+        await manager.close_player(player2_id)
+        await manager.close_player(player_id)
+
+async def leave_game(active_game: ActiveGame, player_id: int):
+    game = active_game.game
+    player_name = active_game.player_name(player_id)
+    player2_id, _ = active_game.opponent(player_id)
+
+    async with active_game.locked():
+        active_game.connected_players.discard(player_id)
+        if not active_game.connected_players:
+            async with database.async_session() as async_session:
+                await active_game.save(async_session)
+            if game.result in FINISHED_GAME_RESULTS:
+                game_registry.delete_game(active_game.sid)
+                await broker.release(game_key(active_game.sid))
+            else:
+                # игра остаётся за этим воркером, пока её снимок в памяти
+                for game_sid in game_registry.park_game(active_game.sid):
+                    if game_registry.get_game(game_sid) is None:
+                        await broker.release(game_key(game_sid))
+
+    try:
+        await manager.send_player_message(
+            message=DisconnectedEvent(
+                message=f"Player \"{player_name}\" is disconnected",
+                player_id=player_id,
+                ),
+            player_id=player2_id,
+            )
+    except:
+        pass
+
+async def reject_join(game_sid: int, player_id: int):
+    # игра удалена или завершилась между проверкой в play_room и загрузкой
+    await broker.release(game_key(game_sid))
+    await manager.send_player_message(
+        message=ErrorEvent(
+            message="Game not found or already ended",
+            player_id=player_id,
+            ),
+        player_id=player_id,
+        )
+    await manager.close_player(player_id, code=status.WS_1008_POLICY_VIOLATION)
+
+class GameConnection:
+    # игрой владеет один воркер; если это другой воркер, действия игрока
+    # пересылаются ему через broker
+    def __init__(self, game_sid: int, player_id: int):
+        self.game_sid = game_sid
+        self.player_id = player_id
+        self.owner: str | None = None
+
+    @property
+    def is_local(self) -> bool:
+        return self.owner == broker.worker_id
+
+    def _message(self, message_type: str, **kwargs) -> dict:
+        return {"type": message_type, "game_sid": self.game_sid, "player_id": self.player_id, **kwargs}
+
+    async def join(self):
+        self.owner = await broker.claim(game_key(self.game_sid))
+        if self.is_local:
+            active_game = await load_game(self.game_sid)
+            if active_game is None:
+                self.owner = None
+                await reject_join(self.game_sid, self.player_id)
+                return
+            await join_game(active_game, self.player_id)
+        else:
+            await broker.send_to_worker(self.owner, self._message("join"))
+
+    async def move(self, data: ClientMessage):
+        if self.is_local:
+            active_game = game_registry.get_game(self.game_sid)
+            if active_game is not None:
+                await play_move(active_game, self.player_id, data)
+        else:
+            await broker.send_to_worker(self.owner, self._message("move", x=data.x, y=data.y))
+
+    async def leave(self):
+        if self.owner is None:
+            return
+        if self.is_local:
+            active_game = game_registry.get_game(self.game_sid)
+            if active_game is not None:
+                await leave_game(active_game, self.player_id)
+        else:
+            await broker.send_to_worker(self.owner, self._message("leave"))
+
+async def handle_broker_message(message: dict):
+    if message["type"] in ("send", "close"):
+        await manager.deliver(message)
+        return
+
+    game_sid = message["game_sid"]
+    player_id = message["player_id"]
+    active_game = game_registry.get_game(game_sid)
+
+    if message["type"] == "join":
+        if active_game is None:
+            # игра успела выгрузиться - забираем её снова или пересылаем новому владельцу
+            owner = await broker.claim(game_key(game_sid))
+            if owner != broker.worker_id:
+                await broker.send_to_worker(owner, message)
+                return
+            active_game = await load_game(game_sid)
+        if active_game is None:
+            await reject_join(game_sid, player_id)
+            return
+        await join_game(active_game, player_id)
+    elif active_game is None:
+        return
+    elif message["type"] == "move":
+        await play_move(active_game, player_id, ClientMessage(x=message["x"], y=message["y"]))
+    elif message["type"] == "leave":
+        await leave_game(active_game, player_id)
+
+class SnapshotSweeper:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._sweep_task: asyncio.Task | None = None
+
+    async def start(self):
+        if self._sweep_task is None:
+            self._sweep_task = asyncio.create_task(self._sweep_loop())
+
+    async def stop(self):
+        if self._sweep_task is not None:
+            self._sweep_task.cancel()
+            try:
+                await self._sweep_task
+            except asyncio.CancelledError:
+                pass
+            self._sweep_task = None
+
+    async def sweep(self):
+        # снимки истекают и на воркере, где никто не выходит из игр: игра выгружается,
+        # а владение ею освобождается, чтобы брокер перестал его продлевать
+        for game_sid in game_registry.pop_expired_snapshots():
+            if game_registry.get_game(game_sid) is None:
+                await broker.release(game_key(game_sid))
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sweep()
+            except Exception:
+                logger.exception("Failed to release expired game snapshots")
+
+
+snapshot_sweeper = SnapshotSweeper(
+    interval=game_settings.game_snapshot_sweep_interval_seconds,
+)
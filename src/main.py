@@ -1,6 +1,42 @@
 from fastapi import FastAPI
+from contextlib import asynccontextmanager
 from src.api import api_router
+from src.fleet_pool import fleet_pool
+from src.password_hasher import password_hasher
+from src.move_log import move_log
+from src.presence import presence
+from src.broker import broker
+from src.database import warm_up_pool
+from src.config import db_settings
+from src.warmup import warm_up
+from src.api.auth import warm_up_tokens
+from src.game_service import handle_broker_message, snapshot_sweeper
+from src.metrics import RequestDurationMiddleware
 
-app = FastAPI()
+# недоступная при старте БД не роняет воркер: шаг повторяется, а /ready отвечает 503 до подключения
+warm_up.add_step("db_pool", lambda: warm_up_pool(db_settings.db_pool_warm_connections), required=True)
+warm_up.add_step("password_hasher", password_hasher.warm_up, required=True)
+warm_up.add_step("tokens", warm_up_tokens, blocking=True)
+warm_up.add_step("fleet_pool", fleet_pool.wait_filled)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await fleet_pool.start()
+    await move_log.start()
+    await presence.start()
+    await broker.start(handle_broker_message)
+    await snapshot_sweeper.start()
+    await warm_up.start()
+    yield
+    await warm_up.stop()
+    await snapshot_sweeper.stop()
+    await broker.stop()
+    await presence.stop()
+    await move_log.stop()
+    await fleet_pool.stop()
+    password_hasher.shutdown()
+
+app = FastAPI(lifespan=lifespan)
+
+app.add_middleware(RequestDurationMiddleware)
 app.include_router(api_router)
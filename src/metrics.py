@@ -0,0 +1,173 @@
+import re
+import time
+from bisect import bisect_left
+from typing import Callable
+
+# текстовый формат Prometheus без внешних зависимостей
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    labels = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        labels.append(extra)
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1):
+        self.values[labelvalues] = self.values.get(labelvalues, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labelvalues, value in self.values.items():
+            lines.append(f"{self.name}{format_labels(self.labelnames, labelvalues)} {format_value(value)}")
+        return lines
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+        ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # по каждому набору меток: счётчики корзин (последняя - +Inf), сумма
+        self.values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labelvalues: str):
+        item = self.values.get(labelvalues)
+        if item is None:
+            item = self.values[labelvalues] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = item
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labelvalues, (counts, total) in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = format_labels(self.labelnames, labelvalues, f'le="{format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = format_labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {format_value(total[0])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.metrics: list[Counter | Histogram] = []
+        self.collectors: list[tuple[str, Callable[[], dict[str, int | float]], tuple[str, ...]]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        metric = Counter(f"{self.prefix}_{name}", documentation, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), **kwargs) -> Histogram:
+        metric = Histogram(f"{self.prefix}_{name}", documentation, labelnames, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, name: str, collect: Callable[[], dict[str, int | float]], counters: tuple[str, ...] = ()):
+        # значения stats() компонентов снимаются в момент запроса /metrics;
+        # counters - монотонные поля (hits, written, ...), остальные отдаются как gauge
+        self.collectors.append((f"{self.prefix}_{name}", collect, counters))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for name, collect, counters in self.collectors:
+            for key, value in collect().items():
+                if key in counters:
+                    metric_name = f"{name}_{key}" if key.endswith("_total") else f"{name}_{key}_total"
+                    lines.append(f"# TYPE {metric_name} counter")
+                else:
+                    metric_name = f"{name}_{key}"
+                    lines.append(f"# TYPE {metric_name} gauge")
+                lines.append(f"{metric_name} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class RequestDurationMiddleware:
+    # чистый ASGI: без BaseHTTPMiddleware и отдельной задачи на каждый запрос
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started_at = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            # необработанное исключение станет 500 в ServerErrorMiddleware, снаружи нас
+            status_code = 500
+            raise
+        finally:
+            # шаблон пути, а не сам путь, чтобы не плодить метки на каждый game_sid
+            route = scope.get("route")
+            http_request_duration.observe(
+                time.perf_counter() - started_at,
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                str(status_code),
+            )
+
+
+STATEMENT_TABLE = re.compile(r'\b(?:FROM|INTO|UPDATE)\s+"?(\w+)', re.IGNORECASE)
+
+def statement_label(statement: str) -> str:
+    # "select user", "insert move" - ограниченный набор меток вместо полного SQL
+    operation = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else "unknown"
+    table = STATEMENT_TABLE.search(statement)
+    return f"{operation} {table.group(1)}" if table else operation
+
+
+metrics = MetricsRegistry("battleship")
+
+http_request_duration = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route", "status"),
+)
+db_statement_duration = metrics.histogram(
+    "db_statement_duration_seconds", "Database statement execution time.", ("statement",),
+)
+db_pool_checkout_wait = metrics.histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a connection from the pool.",
+)
+password_hash_duration = metrics.histogram(
+    "password_hash_duration_seconds", "bcrypt run time in the hasher pool.", ("operation",),
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0),
+)
+password_hash_wait = metrics.histogram(
+    "password_hash_wait_seconds", "Time a bcrypt job waited for a free hasher thread.",
+)
+moves_total = metrics.counter(
+    "moves_total", "Accepted moves by outcome.", ("outcome",),
+)
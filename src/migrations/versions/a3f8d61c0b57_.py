@@ -0,0 +1,181 @@
+"""empty message
+
+Revision ID: a3f8d61c0b57
+Revises: e5b1c7a2d094
+Create Date: 2026-10-17 16:48:31.275940
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+import sqlmodel # edited
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f8d61c0b57'
+down_revision: Union[str, None] = 'e5b1c7a2d094'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# edited: таблицы в том виде, в котором они есть на момент миграции
+gameboard_table = sa.table('gameboard',
+    sa.column('id', sa.Integer()),
+    sa.column('checked_cells', sa.JSON()),
+    sa.column('board', sa.LargeBinary()),
+)
+ship_table = sa.table('ship',
+    sa.column('game_board_id', sa.Integer()),
+    sa.column('name', sa.String()),
+    sa.column('location', sa.JSON()),
+)
+BATCH_SIZE = 1000
+
+# edited: формат доски и клеток на момент миграции - не зависит от кода приложения.
+# Версия формата, число кораблей, по каждому из MAX_SHIPS кораблей код типа и маска
+# оставшихся клеток, затем маска выстрелов. Клетка row * BOARD_SIZE + col - бит с тем же номером.
+BOARD_SIZE = 10
+COLUMN_NAMES = 'abcdefghij'
+SHIP_TYPES = ['speedboat', 'destroyer', 'battleship', 'cruiser']
+BOARD_FORMAT_VERSION = 1
+MAX_SHIPS = 10
+MASK_BYTES = 13
+SHIP_RECORD_BYTES = 1 + MASK_BYTES
+BOARD_BYTES = 2 + MAX_SHIPS * SHIP_RECORD_BYTES + MASK_BYTES
+
+
+def cell_id_to_index(cell: str) -> int:
+    col = COLUMN_NAMES.find(cell[:1].lower())
+    row = int(cell[1:]) - 1
+    if col < 0 or not 0 <= row < BOARD_SIZE:
+        raise ValueError(f'The cell "{cell}" is not on the board')
+    return row * BOARD_SIZE + col
+
+
+def index_to_cell_id(index: int) -> str:
+    row, col = divmod(index, BOARD_SIZE)
+    return COLUMN_NAMES[col] + str(row + 1)
+
+
+def cells_to_mask(cells) -> int:
+    mask = 0
+    for cell in cells or []:
+        mask |= 1 << cell_id_to_index(cell)
+    return mask
+
+
+def mask_to_cells(mask: int) -> list:
+    return [index_to_cell_id(index) for index in range(BOARD_SIZE * BOARD_SIZE) if mask >> index & 1]
+
+
+def encode_board(ships: list, shots_mask: int) -> bytes:
+    if len(ships) > MAX_SHIPS:
+        raise ValueError(f'A board has {len(ships)} ships, at most {MAX_SHIPS} are supported')
+    data = bytearray((BOARD_FORMAT_VERSION, len(ships)))
+    for name, mask in ships:
+        data.append(SHIP_TYPES.index(name))
+        data += mask.to_bytes(MASK_BYTES, 'big')
+    data += bytes((MAX_SHIPS - len(ships)) * SHIP_RECORD_BYTES)
+    data += shots_mask.to_bytes(MASK_BYTES, 'big')
+    return bytes(data)
+
+
+def decode_board(data: bytes) -> tuple:
+    if len(data) != BOARD_BYTES or data[0] != BOARD_FORMAT_VERSION:
+        raise ValueError(f'Unsupported board format ({len(data)} bytes)')
+    ships = []
+    offset = 2
+    for _ in range(data[1]):
+        ships.append((
+            SHIP_TYPES[data[offset]],
+            int.from_bytes(data[offset + 1:offset + SHIP_RECORD_BYTES], 'big'),
+        ))
+        offset += SHIP_RECORD_BYTES
+    return ships, int.from_bytes(data[-MASK_BYTES:], 'big')
+
+
+def board_batches(connection, *columns):
+    # доски читаются пачками по id, чтобы не держать в памяти всю таблицу
+    last_id = 0
+    while True:
+        boards = connection.execute(
+            sa.select(gameboard_table.c.id, *columns)
+            .where(gameboard_table.c.id > last_id)
+            .order_by(gameboard_table.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not boards:
+            return
+        last_id = boards[-1][0]
+        yield boards
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('gameboard', sa.Column('board', sa.LargeBinary(), nullable=True))
+
+    # edited: корабли и checked_cells каждой доски переносятся в одно бинарное поле
+    connection = op.get_bind()
+    for boards in board_batches(connection, gameboard_table.c.checked_cells):
+        ships = connection.execute(
+            sa.select(ship_table.c.game_board_id, ship_table.c.name, ship_table.c.location)
+            .where(ship_table.c.game_board_id.in_([board_id for board_id, _ in boards]))
+        ).all()
+        board_ships = {board_id: [] for board_id, _ in boards}
+        for board_id, name, location in ships:
+            board_ships[board_id].append((name, cells_to_mask(location)))
+        connection.execute(
+            gameboard_table.update()
+            .where(gameboard_table.c.id == sa.bindparam('board_id'))
+            .values(board=sa.bindparam('data')),
+            [
+                {'board_id': board_id, 'data': encode_board(board_ships[board_id], cells_to_mask(checked_cells))}
+                for board_id, checked_cells in boards
+            ],
+        )
+
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.alter_column('gameboard', 'board', existing_type=sa.LargeBinary(), nullable=False)
+    op.drop_index('ix_ship_game_board_id', table_name='ship')
+    op.drop_table('ship')
+    op.drop_column('gameboard', 'checked_cells')
+    # ### end Alembic commands ###
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.add_column('gameboard', sa.Column('checked_cells', sa.JSON(), nullable=True))
+    op.create_table('ship',
+    sa.Column('name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('location', sa.JSON(), nullable=True),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('game_board_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['game_board_id'], ['gameboard.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_ship_game_board_id', 'ship', ['game_board_id'], unique=False)
+    # ### end Alembic commands ###
+
+    # edited: обратное преобразование; потопленные корабли, как и раньше, не сохраняются
+    connection = op.get_bind()
+    for boards in board_batches(connection, gameboard_table.c.board):
+        ships = []
+        checked_cells = []
+        for board_id, data in boards:
+            board_ships, shots_mask = decode_board(data)
+            for name, mask in board_ships:
+                if mask:
+                    ships.append({'game_board_id': board_id, 'name': name, 'location': mask_to_cells(mask)})
+            checked_cells.append({'board_id': board_id, 'cells': mask_to_cells(shots_mask)})
+        if ships:
+            connection.execute(ship_table.insert(), ships)
+        connection.execute(
+            gameboard_table.update()
+            .where(gameboard_table.c.id == sa.bindparam('board_id'))
+            .values(checked_cells=sa.bindparam('cells')),
+            checked_cells,
+        )
+
+    op.drop_column('gameboard', 'board')
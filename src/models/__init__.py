@@ -1,3 +1,5 @@
 from .users import User
-from .ships import Ship, GameBoard
-from .games import Game
\ No newline at end of file
+from .ships import GameBoard
+from .games import Game
+from .moves import Move
+from .stats import PlayerStats
\ No newline at end of file
@@ -1,14 +1,21 @@
-from sqlmodel import SQLModel, Field, Relationship
+from sqlmodel import SQLModel, Field, Relationship, Index
 from src.schemas import GamePublic
 from typing import Optional
 
 class Game(GamePublic, table=True):
+    __table_args__ = (
+        # игры игрока по статусу: player1_id = ? OR player2_id = ? и result IN (...)
+        Index("ix_game_player1_id_result", "player1_id", "result"),
+        Index("ix_game_player2_id_result", "player2_id", "result"),
+    )
+
     sid: int | None = Field(primary_key=True, default=None)
     player1_id: int | None = Field(foreign_key="user.id")
     player2_id: int | None = Field(foreign_key="user.id")
     next_step_player_name: str | None = None
 
+    # доски и корабли не грузятся неявно: стратегия загрузки указывается в каждом запросе
     players_lived_board: list["GameBoard"] = Relationship(
         back_populates="game",
-        sa_relationship_kwargs={"cascade": "all, delete-orphan", "lazy": "joined"},
+        sa_relationship_kwargs={"cascade": "all, delete-orphan", "lazy": "raise"},
         )
\ No newline at end of file
@@ -0,0 +1,11 @@
+from sqlmodel import Field, UniqueConstraint
+from datetime import datetime
+from src.schemas import MovePublic
+
+class Move(MovePublic, table=True):
+    __table_args__ = (UniqueConstraint("game_sid", "seq"),)
+
+    id: int | None = Field(primary_key=True, default=None)
+    game_sid: int = Field(foreign_key="game.sid")
+    shooter_id: int = Field(foreign_key="user.id")
+    created_at: datetime = Field(default_factory=datetime.now)
@@ -0,0 +1,6 @@
+from sqlmodel import Field
+from src.schemas import PlayerStatsBase
+
+class PlayerStats(PlayerStatsBase, table=True):
+    # строка создаётся при регистрации и обновляется при завершении каждой игры игрока
+    player_id: int = Field(primary_key=True, foreign_key="user.id")
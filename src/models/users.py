@@ -1,6 +1,13 @@
 from src.schemas import UserAuthPublic
-from sqlmodel import Field
+from sqlmodel import Field, Index
 
 class User(UserAuthPublic, table=True):
+    __table_args__ = (
+        # лобби: WHERE disabled ORDER BY id с постраничной выборкой по id
+        Index("ix_user_disabled_id", "disabled", "id"),
+        # уникальность имени, точный поиск и поиск по префиксу (LIKE 'abc%')
+        Index("ix_user_username", "username", unique=True, postgresql_ops={"username": "text_pattern_ops"}),
+    )
+
     id: int | None = Field(primary_key=True, default=None)
     disabled: bool = True
\ No newline at end of file
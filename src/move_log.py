@@ -0,0 +1,135 @@
+import asyncio
+import logging
+from datetime import datetime
+from sqlmodel import insert
+from sqlalchemy.exc import DataError, IntegrityError
+from src import database
+from src.config import game_settings
+from src.models import Move
+
+logger = logging.getLogger(__name__)
+
+class MoveLogWriter:
+    def __init__(self, flush_interval: float, batch_size: int, max_retries: int):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.pending: list[dict] = []
+        # неудачные попытки подряд для ходов в начале очереди
+        self.retries = 0
+
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+
+        self._flush_needed = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: asyncio.Task | None = None
+
+    async def start(self):
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+
+    def record(self, game_sid: int, seq: int, shooter_id: int, cell: str, outcome: str):
+        self.pending.append({
+            "game_sid": game_sid,
+            "seq": seq,
+            "shooter_id": shooter_id,
+            "cell": cell,
+            "outcome": outcome,
+            "created_at": datetime.now(),
+        })
+        if len(self.pending) >= self.batch_size:
+            self._flush_needed.set()
+
+    def has_pending(self, game_sid: int) -> bool:
+        return any(move["game_sid"] == game_sid for move in self.pending)
+
+    async def _insert(self, moves: list[dict]):
+        async with database.async_session() as async_session:
+            await async_session.execute(insert(Move), moves)
+            await async_session.commit()
+
+    async def _insert_one_by_one(self, batch: list[dict]):
+        # в пачке есть строка, которую БД не примет никогда (например, повторный ход
+        # с тем же seq): пишем по одной и отбрасываем только такие строки
+        for i, move in enumerate(batch):
+            try:
+                await self._insert([move])
+            except (IntegrityError, DataError):
+                self.dropped += 1
+                logger.exception("Dropped move %d of game %d", move["seq"], move["game_sid"])
+            except Exception:
+                # в пачке остаются только незаписанные ходы
+                del batch[:i]
+                raise
+            else:
+                self.written += 1
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self.pending:
+                return
+            batch = self.pending
+            self.pending = []
+            try:
+                try:
+                    await self._insert(batch)
+                except (IntegrityError, DataError):
+                    await self._insert_one_by_one(batch)
+                else:
+                    self.written += len(batch)
+            except Exception:
+                self.failed_flushes += 1
+                self.retries += 1
+                if self.retries > self.max_retries:
+                    # БД не принимает ходы слишком долго: очередь не должна расти без ограничений
+                    self.retries = 0
+                    self.dropped += len(batch)
+                    logger.exception("Dropped %d moves after %d failed writes", len(batch), self.max_retries + 1)
+                else:
+                    # ходы возвращаются в начало очереди и будут записаны при следующей попытке
+                    self.pending[:0] = batch
+                    logger.exception("Failed to write %d moves", len(batch))
+                raise
+            self.retries = 0
+            self.flushes += 1
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_needed.wait(), timeout=self.flush_interval)
+            except TimeoutError:
+                pass
+            self._flush_needed.clear()
+            try:
+                await self.flush()
+            except Exception:
+                pass
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "pending": len(self.pending),
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+        }
+
+
+move_log = MoveLogWriter(
+    flush_interval=game_settings.move_log_flush_interval_seconds,
+    batch_size=game_settings.move_log_batch_size,
+    max_retries=game_settings.move_log_max_retries,
+)
@@ -0,0 +1,86 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from passlib.context import CryptContext
+from src.config import hash_settings
+from src.metrics import password_hash_duration, password_hash_wait
+
+class HasherBusyError(Exception):
+    pass
+
+class PasswordHasher:
+    def __init__(self, max_workers: int, max_queue: int):
+        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hasher")
+        self.max_workers = max_workers
+        self.max_pending = max_workers + max_queue
+        self.pending = 0
+
+        self.calls = 0
+        self.rejected = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.run_time_total = 0.0
+
+    async def _run(self, operation: str, func, *args):
+        # bcrypt отпускает GIL, поэтому потоки действительно работают параллельно
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HasherBusyError(f"{self.pending} password hash operations are already pending")
+
+        def job():
+            started_at = time.perf_counter()
+            result = func(*args)
+            return started_at, time.perf_counter(), result
+
+        self.pending += 1
+        submitted_at = time.perf_counter()
+        try:
+            started_at, finished_at, result = await asyncio.get_running_loop().run_in_executor(self.executor, job)
+        finally:
+            self.pending -= 1
+
+        wait_time = started_at - submitted_at
+        self.calls += 1
+        self.wait_time_total += wait_time
+        self.wait_time_max = max(self.wait_time_max, wait_time)
+        self.run_time_total += finished_at - started_at
+        password_hash_wait.observe(wait_time)
+        password_hash_duration.observe(finished_at - started_at, operation)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", self.pwd_context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run("verify", self.pwd_context.verify, plain_password, hashed_password)
+
+    async def warm_up(self):
+        # passlib при первом использовании загружает backend bcrypt и проверяет его тестовыми хешами;
+        # потоки пула создаются сразу все, а не по одному на первых логинах
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.pwd_context.handler().get_backend)
+        await asyncio.gather(*(
+            loop.run_in_executor(self.executor, time.sleep, 0.01) for _ in range(self.max_workers)
+        ))
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "calls": self.calls,
+            "rejected": self.rejected,
+            "wait_time_total": self.wait_time_total,
+            "wait_time_max": self.wait_time_max,
+            "run_time_total": self.run_time_total,
+        }
+
+
+password_hasher = PasswordHasher(
+    max_workers=hash_settings.password_hash_workers,
+    max_queue=hash_settings.password_hash_max_queue,
+)
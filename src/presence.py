@@ -0,0 +1,115 @@
+import asyncio
+import logging
+from sqlmodel import update
+from src import database
+from src.config import game_settings
+from src.models import User
+from src.user_cache import invalidate_users
+
+logger = logging.getLogger(__name__)
+
+class PresenceRegistry:
+    def __init__(self, flush_interval: float):
+        self.flush_interval = flush_interval
+        # игроки, подключённые к этому воркеру - источник правды для онлайна
+        self.online: set[int] = set()
+        # player_id -> disabled; несколько переключений до записи схлопываются в последнее
+        self.pending: dict[int, bool] = {}
+        # player_id -> username отключившихся, пока отключение не записано в БД (для лобби)
+        self.pending_usernames: dict[int, str] = {}
+
+        self.written = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: asyncio.Task | None = None
+
+    async def start(self):
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+
+    def set_online(self, player_id: int):
+        self.online.add(player_id)
+        self.pending[player_id] = False
+        self.pending_usernames.pop(player_id, None)
+
+    def set_offline(self, player_id: int, username: str):
+        self.online.discard(player_id)
+        self.pending[player_id] = True
+        self.pending_usernames[player_id] = username
+
+    def pending_offline(self) -> dict[int, str]:
+        # уже отключились, но в БД ещё отмечены как онлайн
+        return self.pending_usernames
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self.pending:
+                return
+            batch = self.pending
+            batch_usernames = self.pending_usernames
+            self.pending = {}
+            self.pending_usernames = {}
+            online_ids = [player_id for player_id, disabled in batch.items() if not disabled]
+            offline_ids = [player_id for player_id, disabled in batch.items() if disabled]
+            changed_usernames = []
+            try:
+                async with database.async_session() as async_session:
+                    if online_ids:
+                        changed = await async_session.execute(
+                            update(User).where(User.id.in_(online_ids)).values(disabled=False).returning(User.username)
+                        )
+                        changed_usernames += changed.scalars().all()
+                    if offline_ids:
+                        changed = await async_session.execute(
+                            update(User).where(User.id.in_(offline_ids)).values(disabled=True).returning(User.username)
+                        )
+                        changed_usernames += changed.scalars().all()
+                    await async_session.commit()
+            except Exception:
+                # более свежие изменения, пришедшие во время записи, не перетираются
+                for player_id, disabled in batch.items():
+                    if player_id not in self.pending:
+                        self.pending[player_id] = disabled
+                        if disabled:
+                            self.pending_usernames[player_id] = batch_usernames[player_id]
+                self.failed_flushes += 1
+                logger.exception("Failed to write presence of %d players", len(batch))
+                raise
+            # в кеше пользователей снимок с флагом disabled из БД
+            invalidate_users(changed_usernames)
+            self.written += len(batch)
+            self.flushes += 1
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                pass
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "online": len(self.online),
+            "pending": len(self.pending),
+            "written": self.written,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+        }
+
+
+presence = PresenceRegistry(
+    flush_interval=game_settings.presence_flush_interval_seconds,
+)
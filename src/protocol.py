@@ -0,0 +1,62 @@
+from fastapi import WebSocket
+from enum import Enum
+from src.schemas import ClientMessage, GameEvent
+from src.cells import BOARD_SIZE, COLUMN_NAMES
+from src.game_board import cell_id_to_index
+import struct
+
+# компактный протокол: ход клиента - один байт с индексом клетки (row * 10 + col),
+# событие сервера - 6 байт: код события, индекс клетки, id игрока
+BINARY_SUBPROTOCOL = "battleship.binary.v1"
+EVENT_FRAME = struct.Struct("!BBI")
+NO_CELL = 0xFF
+# готовое сообщение на каждый допустимый байт хода: разбор хода ничего не создаёт
+BINARY_MOVES = [
+    ClientMessage.model_construct(x=COLUMN_NAMES[index % BOARD_SIZE], y=index // BOARD_SIZE + 1)
+    for index in range(BOARD_SIZE * BOARD_SIZE)
+]
+
+class Protocol(str, Enum):
+    JSON = "json"
+    BINARY = "binary"
+
+def negotiate_protocol(websocket: WebSocket) -> tuple[Protocol, str | None]:
+    # JSON остаётся протоколом по умолчанию
+    if BINARY_SUBPROTOCOL in websocket.scope.get("subprotocols", []):
+        return Protocol.BINARY, BINARY_SUBPROTOCOL
+    if websocket.query_params.get("protocol") == Protocol.BINARY.value:
+        return Protocol.BINARY, None
+    return Protocol.JSON, None
+
+def encode_event(event: GameEvent, protocol: Protocol) -> str | bytes:
+    if protocol == Protocol.BINARY:
+        return EVENT_FRAME.pack(
+            event.code,
+            NO_CELL if event.cell is None else cell_id_to_index(event.cell),
+            event.player_id,
+            )
+    return event.model_dump_json()
+
+def decode_move(data: bytes) -> ClientMessage | None:
+    if len(data) != 1 or data[0] >= len(BINARY_MOVES):
+        return None
+    return BINARY_MOVES[data[0]]
+
+async def send_frame(websocket: WebSocket, data: str | bytes):
+    if isinstance(data, bytes):
+        await websocket.send_bytes(data)
+    else:
+        await websocket.send_text(data)
+
+async def receive_move(websocket: WebSocket, protocol: Protocol) -> ClientMessage | None:
+    if protocol == Protocol.BINARY:
+        try:
+            return decode_move(await websocket.receive_bytes())
+        except KeyError:
+            # текстовый фрейм в бинарном протоколе
+            return None
+    data = await websocket.receive_text()
+    try:
+        return ClientMessage.model_validate_json(data)
+    except ValueError:
+        return None
@@ -1,5 +1,12 @@
 from .tokens import Token, TokenWithRefresh
 from .users import UserBase, UserAuthPublic, UserPublic
-from .games import GameResult, GamePublic, GamePlayerPublic
+from .games import GameResult, ACTIVE_GAME_RESULTS, FINISHED_GAME_RESULTS, GamePublic, GamePlayerPublic
 from .ships import ShipPublic, GameBoardPublic, ShipType, GameBoardBase
-from .game_messages import ServerMessage, ClientMessage
\ No newline at end of file
+from .game_messages import (
+    ServerMessage, ClientMessage, EventCode, GameEvent, game_event_adapter,
+    ErrorEvent, ConnectedEvent, DisconnectedEvent, StartEvent, ResumedEvent,
+    PausedEvent, TurnEvent, AlreadyCheckedEvent, MoveEvent, MissEvent,
+    HitEvent, SunkEvent, WinEvent,
+)
+from .moves import MoveOutcome, MovePublic
+from .stats import PlayerStatsBase, PlayerStatsPublic
\ No newline at end of file
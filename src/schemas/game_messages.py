@@ -1,9 +1,119 @@
 from pydantic import BaseModel
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, field_validator
+from enum import IntEnum
+from typing import Annotated, ClassVar, Literal, Union
+from src.cells import BOARD_SIZE, COLUMN_INDEXES, COLUMN_NAMES, move_to_index
 
 class ServerMessage(BaseModel):
     message: str
 
 class ClientMessage(BaseModel):
-    x: str = Field(pattern='^[a-jA-J]$')
-    y: int = Field(ge=1, le=10)
\ No newline at end of file
+    # неизменяемый: готовые сообщения бинарного протокола общие для всех ходов
+    model_config = ConfigDict(frozen=True)
+
+    x: str
+    y: int = Field(ge=1, le=BOARD_SIZE)
+
+    @field_validator("x")
+    @classmethod
+    def check_column(cls, x: str) -> str:
+        # буква столбца заменяется строчной из таблицы клеток
+        col = COLUMN_INDEXES.get(x)
+        if col is None:
+            raise ValueError("x must be a column letter from a to j")
+        return COLUMN_NAMES[col]
+
+    @property
+    def cell_index(self) -> int:
+        return move_to_index(self.x, self.y)
+
+class EventCode(IntEnum):
+    ERROR = 0
+    CONNECTED = 1
+    DISCONNECTED = 2
+    START = 3
+    RESUMED = 4
+    PAUSED = 5
+    TURN = 6
+    ALREADY_CHECKED = 7
+    MOVE = 8
+    MISS = 9
+    HIT = 10
+    SUNK = 11
+    WIN = 12
+
+class GameEvent(BaseModel):
+    code: ClassVar[EventCode]
+    event: str
+    message: str
+    # игрок, к которому относится событие: подключившийся, стрелявший, победитель
+    # или тот, чей ход следующий (start, resumed, turn, miss, hit, sunk)
+    player_id: int = 0
+    cell: str | None = None
+
+class ErrorEvent(GameEvent):
+    code: ClassVar[EventCode] = EventCode.ERROR
+    event: Literal["error"] = "error"
+
+class ConnectedEvent(GameEvent):
+    code: ClassVar[EventCode] = EventCode.CONNECTED
+    event: Literal["connected"] = "connected"
+
+class DisconnectedEvent(GameEvent):
+    code: ClassVar[EventCode] = EventCode.DISCONNECTED
+    event: Literal["disconnected"] = "disconnected"
+
+class StartEvent(GameEvent):
+    code: ClassVar[EventCode] = EventCode.START
+    event: Literal["start"] = "start"
+
+class ResumedEvent(GameEvent):
+    code: ClassVar[EventCode] = EventCode.RESUMED
+    event: Literal["resumed"] = "resumed"
+
+class PausedEvent(GameEvent):
+    code: ClassVar[EventCode] = EventCode.PAUSED
+    event: Literal["paused"] = "paused"
+
+class TurnEvent(GameEvent):
+    code: ClassVar[EventCode] = EventCode.TURN
+    event: Literal["turn"] = "turn"
+
+class AlreadyCheckedEvent(GameEvent):
+    code: ClassVar[EventCode] = EventCode.ALREADY_CHECKED
+    event: Literal["already_checked"] = "already_checked"
+    cell: str
+
+class MoveEvent(GameEvent):
+    code: ClassVar[EventCode] = EventCode.MOVE
+    event: Literal["move"] = "move"
+    cell: str
+
+class MissEvent(GameEvent):
+    code: ClassVar[EventCode] = EventCode.MISS
+    event: Literal["miss"] = "miss"
+    cell: str
+
+class HitEvent(GameEvent):
+    code: ClassVar[EventCode] = EventCode.HIT
+    event: Literal["hit"] = "hit"
+    cell: str
+
+class SunkEvent(GameEvent):
+    code: ClassVar[EventCode] = EventCode.SUNK
+    event: Literal["sunk"] = "sunk"
+    cell: str
+
+class WinEvent(GameEvent):
+    code: ClassVar[EventCode] = EventCode.WIN
+    event: Literal["win"] = "win"
+
+# восстановление события по полю event, например после пересылки между воркерами
+game_event_adapter = TypeAdapter(Annotated[
+    Union[
+        ErrorEvent, ConnectedEvent, DisconnectedEvent, StartEvent, ResumedEvent,
+        PausedEvent, TurnEvent, AlreadyCheckedEvent, MoveEvent, MissEvent,
+        HitEvent, SunkEvent, WinEvent,
+    ],
+    Field(discriminator="event"),
+])
@@ -10,6 +10,9 @@ class GameResult(str, Enum):
     NOT_ENDED = "not ended"
     NOT_STARTED = "not started"
 
+ACTIVE_GAME_RESULTS = (GameResult.NOT_STARTED.value, GameResult.NOT_ENDED.value)
+FINISHED_GAME_RESULTS = (GameResult.PLAYER_1_WIN.value, GameResult.PLAYER_2_WIN.value)
+
 class GamePublic(SQLModel):
     sid: int
     end_date: datetime | None = None
@@ -0,0 +1,17 @@
+from sqlmodel import SQLModel
+from datetime import datetime
+from enum import Enum
+
+class MoveOutcome(str, Enum):
+    MISS = "miss"
+    HIT = "hit"
+    SUNK = "sunk"
+    WIN = "win"
+
+class MovePublic(SQLModel):
+    game_sid: int
+    seq: int
+    shooter_id: int
+    cell: str
+    outcome: str
+    created_at: datetime
@@ -0,0 +1,18 @@
+from sqlmodel import SQLModel
+
+class PlayerStatsBase(SQLModel):
+    games_played: int = 0
+    wins: int = 0
+    losses: int = 0
+    # ходы самого игрока в играх с журналом ходов
+    total_moves: int = 0
+    # игры с журналом ходов: игры, сыгранные до его появления, в средней длине не учитываются
+    logged_games: int = 0
+
+class PlayerStatsPublic(SQLModel):
+    username: str
+    games_played: int
+    wins: int
+    losses: int
+    win_rate: float
+    average_game_length: float
@@ -0,0 +1,25 @@
+from typing import NamedTuple
+from src.cache import TTLCache
+from src.config import cache_settings
+from src.models import User
+
+class CachedUser(NamedTuple):
+    # неизменяемый снимок строки user: один объект делят все запросы воркера
+    id: int
+    username: str
+    hashed_password: str
+    disabled: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "CachedUser":
+        return cls(id=user.id, username=user.username, hashed_password=user.password, disabled=user.disabled)
+
+# username -> CachedUser; сбрасывается при любом изменении этих полей в БД
+user_cache: TTLCache[str, CachedUser] = TTLCache(
+    max_size=cache_settings.user_cache_max_size,
+    ttl=cache_settings.user_cache_ttl_seconds,
+)
+
+def invalidate_users(usernames: list[str]):
+    for username in usernames:
+        user_cache.pop(username)
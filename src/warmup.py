@@ -0,0 +1,82 @@
+import asyncio
+import logging
+import time
+from typing import Callable
+from src.config import game_settings
+
+logger = logging.getLogger(__name__)
+
+class WarmUp:
+    def __init__(self, retry_interval: float):
+        self.retry_interval = retry_interval
+        # name, step, required, blocking
+        self.steps: list[tuple[str, Callable, bool, bool]] = []
+        # воркер принимает соединения сразу, а готовность (/ready) отдаёт только после прогрева
+        self.ready = False
+        self.durations: dict[str, float] = {}
+        self.failed = 0
+        # шаги, упавшие в последний раз; обязательные остаются здесь, пока повтор не пройдёт
+        self.failing: set[str] = set()
+        self._task: asyncio.Task | None = None
+
+    def add_step(self, name: str, step: Callable, required: bool = False, blocking: bool = False):
+        # required - без шага воркер не готов, шаг повторяется до успеха;
+        # blocking - обычная функция, выполняется в пуле потоков, а не в цикле событий
+        self.steps.append((name, step, required, blocking))
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self.ready = False
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _call(self, step: Callable, blocking: bool):
+        if blocking:
+            await asyncio.get_running_loop().run_in_executor(None, step)
+        else:
+            await step()
+
+    async def _run_step(self, name: str, step: Callable, required: bool, blocking: bool):
+        started_at = time.perf_counter()
+        while True:
+            try:
+                await self._call(step, blocking)
+                self.failing.discard(name)
+                break
+            except Exception:
+                self.failed += 1
+                self.failing.add(name)
+                logger.exception("Warm-up step %s failed", name)
+                if not required:
+                    # необязательный шаг - только оптимизация: первые запросы будут медленнее
+                    break
+            await asyncio.sleep(self.retry_interval)
+        self.durations[name] = time.perf_counter() - started_at
+
+    async def _run(self):
+        started_at = time.perf_counter()
+        await asyncio.gather(*(self._run_step(*step) for step in self.steps))
+        self.durations["total"] = time.perf_counter() - started_at
+        self.ready = True
+        logger.info("Warm-up finished in %.3fs", self.durations["total"])
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "ready": int(self.ready),
+            "failed": self.failed,
+            "failing": len(self.failing),
+            **{f"{name}_seconds": duration for name, duration in self.durations.items()},
+        }
+
+
+warm_up = WarmUp(
+    retry_interval=game_settings.warm_up_retry_interval_seconds,
+)
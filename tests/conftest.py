@@ -0,0 +1,113 @@
+import os
+
+# настройки читаются при импорте src: по умолчанию тесты идут на общей SQLite в памяти;
+# TEST_DB_URL - отдельная тестовая база, например Postgres с применёнными миграциями
+os.environ["DB_URL"] = os.environ.get(
+    "TEST_DB_URL", "sqlite+aiosqlite:///file:battleship_tests?mode=memory&cache=shared&uri=true",
+)
+for name, value in {
+    "DB_USER": "test",
+    "DB_PASSWORD": "test",
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_NAME": "test",
+    "JWT_SECRET_KEY": "test-secret-key-of-at-least-32-bytes",
+    "JWT_ALGORITHM": "HS256",
+    "JWT_ACCESS_TOKEN_EXPIRE_MINUTES": "15",
+    "JWT_REFRESH_TOKEN_EXPIRE_DAYS": "7",
+}.items():
+    os.environ.setdefault(name, value)
+
+import uuid
+
+import httpx
+import pytest
+from sqlalchemy import event
+from sqlmodel import SQLModel
+
+from src.database import async_engine
+from src.game_registry import game_registry
+from src.main import app
+from tests.helpers import create_game, login, register
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+async def database():
+    # база в памяти живёт, пока открыто хотя бы одно соединение
+    async with async_engine.connect() as keeper:
+        await keeper.run_sync(SQLModel.metadata.create_all)
+        await keeper.commit()
+        yield async_engine
+    await async_engine.dispose()
+
+
+@pytest.fixture
+async def client(database):
+    # lifespan не выполняется: фоновые задачи не добавляют своих запросов
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+def unique_name():
+    suffix = uuid.uuid4().hex[:8]
+    return lambda prefix: f"{prefix}_{suffix}"
+
+
+class StatementRecorder:
+    # SQL-запросы внутри measure(); строки считаются повторным выполнением каждого SELECT через count(*)
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements: list[tuple[str, tuple]] = []
+        self.recording = False
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if self.recording:
+            self.statements.append((statement, parameters))
+
+    async def measure(self, operation) -> tuple[int, int]:
+        self.statements = []
+        self.recording = True
+        try:
+            await operation()
+        finally:
+            self.recording = False
+        rows = 0
+        async with self.engine.connect() as connection:
+            for statement, parameters in self.statements:
+                if statement.lstrip().upper().startswith("SELECT"):
+                    counted = await connection.exec_driver_sql(
+                        f"SELECT count(*) FROM ({statement}) AS counted", parameters,
+                    )
+                    rows += counted.scalar()
+        return len(self.statements), rows
+
+
+@pytest.fixture
+def recorder(database):
+    recorder = StatementRecorder(database)
+    event.listen(database.sync_engine, "before_cursor_execute", recorder)
+    yield recorder
+    event.remove(database.sync_engine, "before_cursor_execute", recorder)
+
+
+@pytest.fixture
+async def players(client, unique_name):
+    player1, player2 = unique_name("player1"), unique_name("player2")
+    await register(client, player1)
+    await register(client, player2)
+    return player1, player2
+
+
+@pytest.fixture
+async def game_sid(client, players):
+    player1, player2 = players
+    sid = await create_game(client, await login(client, player1), player2)
+    yield sid
+    game_registry.delete_game(sid)
+    game_registry.snapshots.pop(sid)
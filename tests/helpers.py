@@ -0,0 +1,18 @@
+async def request(client, method: str, url: str, **kwargs):
+    response = await client.request(method, url, **kwargs)
+    response.raise_for_status()
+    return response
+
+
+async def register(client, username: str):
+    await request(client, "POST", "/players/register", json={"username": username, "password": "test"})
+
+
+async def login(client, username: str) -> dict[str, str]:
+    response = await request(client, "POST", "/players/login", data={"username": username, "password": "test"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def create_game(client, headers: dict[str, str], player2: str) -> int:
+    response = await request(client, "POST", "/games/create", headers={**headers, "player2-name": player2})
+    return response.json()["sid"]
@@ -0,0 +1,48 @@
+import pytest
+
+from src import database
+from src.cells import CELL_IDS
+from src.game_registry import game_registry
+from src.game_service import load_game
+from src.move_log import move_log
+
+pytestmark = pytest.mark.anyio
+
+
+def shoot(active_game, shooter_id: int, index: int):
+    target_id = active_game.opponent(shooter_id)[0]
+    active_game.record_move(shooter_id, CELL_IDS[index], active_game.get_board(target_id).shoot(index))
+
+
+async def reload(game_sid: int):
+    game_registry.delete_game(game_sid)
+    return await load_game(game_sid)
+
+
+async def test_saved_boards_are_a_checkpoint_for_the_move_log(recorder, game_sid):
+    active_game = await load_game(game_sid)
+    player1_id, player2_id = active_game.player_ids
+    for index in (0, 11, 22):
+        shoot(active_game, player1_id, index)
+    shoot(active_game, player2_id, 33)
+    async with database.async_session() as async_session:
+        await active_game.save(async_session)
+
+    # после сохранения игра читается из двух строк досок, без журнала ходов
+    measured = {}
+
+    async def load():
+        measured["game"] = await reload(game_sid)
+    assert await recorder.measure(load) == (2, 2)
+    restored = measured["game"]
+    assert restored.next_move_seq == 4
+    assert restored.moves_by_player == {player1_id: 3, player2_id: 1}
+    for player_id in active_game.player_ids:
+        assert restored.get_board(player_id).to_bytes() == active_game.get_board(player_id).to_bytes()
+
+    # ходы после контрольной точки повторяются из журнала
+    shoot(restored, player1_id, 44)
+    await move_log.flush()
+    restored_again = await reload(game_sid)
+    assert restored_again.next_move_seq == 5
+    assert restored_again.get_board(player2_id).to_bytes() == restored.get_board(player2_id).to_bytes()
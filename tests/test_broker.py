@@ -0,0 +1,124 @@
+import anyio
+import fakeredis
+import pytest
+
+from src.broker import InMemoryBroker, RedisBroker, game_key, worker_channel
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def workers():
+    server = fakeredis.FakeServer()
+
+    def worker(worker_id: str) -> RedisBroker:
+        client = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+        return RedisBroker(worker_id=worker_id, url="", claim_ttl=30, client=client)
+    return worker("worker1"), worker("worker2")
+
+
+async def test_release_keeps_claim_of_another_worker(workers):
+    worker1, worker2 = workers
+    key = game_key(1)
+    assert await worker1.claim(key) == "worker1"
+    # ключ истёк, и игру забрал другой воркер
+    await worker1.client.delete(key)
+    assert await worker2.claim(key) == "worker2"
+
+    await worker1.release(key)
+
+    assert await worker2.get_owner(key) == "worker2"
+
+
+async def test_release_own_claim(workers):
+    worker1, _ = workers
+    key = game_key(1)
+    await worker1.claim(key)
+
+    await worker1.release(key)
+
+    assert await worker1.get_owner(key) is None
+    assert key not in worker1.claims
+
+
+async def test_renew_skips_claim_of_another_worker(workers):
+    worker1, worker2 = workers
+    key, lost_key, expired_key = game_key(1), game_key(2), game_key(3)
+    for claimed in (key, lost_key, expired_key):
+        await worker1.claim(claimed)
+    await worker1.client.delete(lost_key)
+    await worker2.claim(lost_key)
+    await worker2.client.expire(lost_key, 5)
+    await worker1.client.delete(expired_key)
+
+    await worker1.renew_claims()
+
+    assert await worker1.client.ttl(key) == 30
+    # чужой ключ не продлевается и больше не считается своим
+    assert await worker2.get_owner(lost_key) == "worker2"
+    assert await worker2.client.ttl(lost_key) == 5
+    assert lost_key not in worker1.claims
+    # истёкший никем не занятый ключ занимается снова
+    assert await worker1.get_owner(expired_key) == "worker1"
+    assert expired_key in worker1.claims
+
+
+async def wait_for(condition):
+    with anyio.fail_after(2):
+        while not condition():
+            await anyio.sleep(0.01)
+
+
+async def test_slow_game_does_not_block_other_games():
+    broker = InMemoryBroker("worker1")
+    release = anyio.Event()
+    handled = []
+
+    async def handler(message):
+        if message["type"] == "join" and message["game_sid"] == 1:
+            # загрузка игры из БД и ожидание lock
+            await release.wait()
+        handled.append((message["game_sid"], message["type"]))
+
+    await broker.start(handler)
+    try:
+        for game_sid, message_type in ((1, "join"), (1, "move"), (2, "join"), (2, "move")):
+            await broker.send_to_worker("worker1", {"type": message_type, "game_sid": game_sid, "player_id": 1})
+        await wait_for(lambda: len(handled) == 2)
+        assert handled == [(2, "join"), (2, "move")]
+        release.set()
+        await wait_for(lambda: len(handled) == 4)
+        # внутри одной игры порядок сохраняется
+        assert handled[2:] == [(1, "join"), (1, "move")]
+    finally:
+        await broker.stop()
+
+
+async def test_listener_resubscribes_after_connection_loss(workers, monkeypatch):
+    monkeypatch.setattr("src.broker.RESUBSCRIBE_DELAY_SECONDS", 0.01)
+    worker1, worker2 = workers
+    received = []
+
+    async def handler(message):
+        received.append(message)
+
+    await worker1.start(handler)
+    try:
+        await worker2.client.publish(worker_channel("worker1"), "not json")
+        await worker2.send_to_worker("worker1", {"type": "send", "player_id": 1, "seq": 1})
+        await wait_for(lambda: len(received) == 1)
+
+        # следующее чтение из подписки обрывается, как при потере соединения с Redis
+        pubsub = worker1._pubsub
+
+        async def connection_lost(*args, **kwargs):
+            raise ConnectionError("Connection closed by server.")
+        monkeypatch.setattr(pubsub, "parse_response", connection_lost)
+        await worker2.send_to_worker("worker1", {"type": "send", "player_id": 1, "seq": 2})
+        await wait_for(lambda: worker1._pubsub is not pubsub and worker1.connected)
+
+        await worker2.send_to_worker("worker1", {"type": "send", "player_id": 1, "seq": 3})
+        await wait_for(lambda: len(received) == 3)
+        assert [message["seq"] for message in received] == [1, 2, 3]
+    finally:
+        await worker1.stop()
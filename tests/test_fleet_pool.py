@@ -0,0 +1,49 @@
+import anyio
+import pytest
+
+from src import fleet_pool as fleet_pool_module
+from src.fleet_pool import FleetPool
+from src.game_board import BitBoard
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_pooled_fleet_bytes_match_public_board():
+    pool = FleetPool(max_size=4, low_water_mark=1, refill_batch_size=2)
+    await pool.start()
+    try:
+        with anyio.fail_after(5):
+            await pool.wait_filled()
+        fleets = pool.pop_many(5)
+    finally:
+        await pool.stop()
+
+    assert pool.hits == 4 and pool.misses == 1
+    for fleet in fleets:
+        assert BitBoard.from_bytes(fleet.data).to_public() == fleet.public
+
+
+async def test_refill_survives_generation_error(monkeypatch):
+    calls = 0
+    generate = fleet_pool_module.generate_pooled_fleets
+
+    def flaky_generate(n):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RuntimeError("generation failed")
+        return generate(n)
+
+    monkeypatch.setattr(fleet_pool_module, "generate_pooled_fleets", flaky_generate)
+    monkeypatch.setattr(fleet_pool_module, "REFILL_RETRY_SECONDS", 0)
+    pool = FleetPool(max_size=4, low_water_mark=1, refill_batch_size=2)
+    await pool.start()
+    try:
+        with anyio.fail_after(5):
+            while len(pool.fleets) < pool.max_size:
+                await anyio.sleep(0.01)
+    finally:
+        await pool.stop()
+
+    assert pool.failed_refills == 1
+    assert pool.refills == 1
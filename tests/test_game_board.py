@@ -0,0 +1,116 @@
+import importlib.util
+import random
+from pathlib import Path
+
+import pytest
+
+from src.cells import BOARD_SIZE, CELL_INDEXES
+from src.game_board import (
+    BOARD_BYTES, BOARD_FORMAT_VERSION, SHIP_SIZES, BitBoard, ShotResult, generate_board, generate_fleet,
+    mask_to_indexes,
+)
+from src.schemas import GameBoardPublic, ShipPublic, ShipType
+
+
+def board_with(*ships: tuple[ShipType, list[str]]) -> BitBoard:
+    return BitBoard.from_public(GameBoardPublic(ships=[
+        ShipPublic(name=ship_type.value, location=location) for ship_type, location in ships
+    ]))
+
+
+def test_shoot_results_in_order():
+    board = board_with((ShipType.DESTROYER, ["a1", "b1"]), (ShipType.SPEEDBOAT, ["j10"]))
+    assert board.shoot(CELL_INDEXES["e5"]) == ShotResult.MISS
+    assert board.shoot(CELL_INDEXES["a1"]) == ShotResult.HIT
+    assert board.shoot(CELL_INDEXES["b1"]) == ShotResult.SUNK
+    assert not board.all_sunk()
+    assert board.shoot(CELL_INDEXES["j10"]) == ShotResult.WIN
+    assert board.all_sunk()
+    assert board.checked_cells() == ["a1", "b1", "e5", "j10"]
+
+
+@pytest.mark.parametrize("cell", ["e5", "a1"])
+def test_second_shot_at_the_same_cell(cell):
+    board = board_with((ShipType.DESTROYER, ["a1", "b1"]))
+    board.shoot(CELL_INDEXES[cell])
+    fleet_mask, shots_mask = board.fleet_mask, board.shots_mask
+    assert board.shoot(CELL_INDEXES[cell]) == ShotResult.ALREADY_CHECKED
+    assert (board.fleet_mask, board.shots_mask) == (fleet_mask, shots_mask)
+    # повторный выстрел не топит корабль
+    assert board.shoot(CELL_INDEXES["b1"]) == (ShotResult.WIN if cell == "a1" else ShotResult.HIT)
+
+
+def test_public_round_trip():
+    random.seed(0)
+    for _ in range(50):
+        board = generate_board()
+        assert BitBoard.from_public(board).to_public() == board
+
+
+def ship_cells(mask: int) -> list[tuple[int, int]]:
+    return [divmod(index, BOARD_SIZE) for index in range(BOARD_SIZE * BOARD_SIZE) if mask >> index & 1]
+
+
+def test_generated_fleets_follow_the_rules():
+    # правила проверяются по координатам, а не по таблицам PLACEMENTS
+    random.seed(2)
+    expected_ships = sorted((ship_type.value, size) for ship_type, size in SHIP_SIZES)
+    for _ in range(300):
+        fleet = generate_fleet()
+        ships = [ship_cells(mask) for mask in fleet.ship_masks]
+        assert sorted(zip(fleet.ship_names, map(len, ships))) == expected_ships
+
+        owner: dict[tuple[int, int], int] = {}
+        for ship_index, cells in enumerate(ships):
+            rows, cols = {row for row, _ in cells}, {col for _, col in cells}
+            # прямая линия без разрывов
+            assert len(rows) == 1 or len(cols) == 1
+            assert max(rows) - min(rows) + max(cols) - min(cols) == len(cells) - 1
+            for cell in cells:
+                assert cell not in owner, "ships overlap"
+                owner[cell] = ship_index
+        for (row, col), ship_index in owner.items():
+            for neighbour_row in (row - 1, row, row + 1):
+                for neighbour_col in (col - 1, col, col + 1):
+                    neighbour = owner.get((neighbour_row, neighbour_col), ship_index)
+                    assert neighbour == ship_index, f"ships touch at {(row, col)}"
+
+
+def load_board_migration():
+    path = Path(__file__).parent.parent / "src" / "migrations" / "versions" / "a3f8d61c0b57_.py"
+    spec = importlib.util.spec_from_file_location("board_migration", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_bytes_round_trip():
+    random.seed(1)
+    migration = load_board_migration()
+    for _ in range(50):
+        board = generate_fleet()
+        for index in random.sample(range(BOARD_SIZE * BOARD_SIZE), random.randrange(60)):
+            board.shoot(index)
+        data = board.to_bytes()
+        assert len(data) == BOARD_BYTES
+        assert BitBoard.count_shots(data) == board.shots_mask.bit_count()
+
+        restored = BitBoard.from_bytes(data)
+        assert restored.ship_names == board.ship_names
+        assert restored.ship_masks == board.ship_masks
+        assert (restored.fleet_mask, restored.shots_mask) == (board.fleet_mask, board.shots_mask)
+        # подбитые клетки в маски кораблей не попадают, для них cell_ship не нужен
+        for index in mask_to_indexes(board.fleet_mask):
+            assert restored.cell_ship[index] == board.cell_ship[index]
+        assert restored.to_bytes() == data
+        # формат на диске совпадает с замороженным кодировщиком миграции
+        assert migration.encode_board(list(zip(board.ship_names, board.ship_masks)), board.shots_mask) == data
+        assert migration.decode_board(data) == (list(zip(board.ship_names, board.ship_masks)), board.shots_mask)
+
+
+def test_unsupported_bytes_are_rejected():
+    data = generate_fleet().to_bytes()
+    with pytest.raises(ValueError):
+        BitBoard.from_bytes(data[:-1])
+    with pytest.raises(ValueError):
+        BitBoard.from_bytes(bytes([BOARD_FORMAT_VERSION + 1]) + data[1:])
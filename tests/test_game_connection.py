@@ -0,0 +1,101 @@
+import json
+import logging
+
+import anyio
+import pytest
+from fastapi import status
+
+from src import game_service
+from src.broker import broker, game_key
+from src.connection_manager import manager
+from src.game_service import GameConnection, load_game, play_move
+from src.schemas import ClientMessage
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeWebSocket:
+    def __init__(self, gate: anyio.Event | None = None, broken: bool = False):
+        self.sent: list[str] = []
+        self.close_code: int | None = None
+        # gate - медленный клиент: отправка ждёт, пока событие не выставят
+        self.gate = gate
+        self.broken = broken
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, data: str):
+        if self.broken:
+            raise ConnectionError("socket is gone")
+        if self.gate is not None:
+            await self.gate.wait()
+        self.sent.append(data)
+
+    async def close(self, code: int = 1000, reason=None):
+        self.close_code = code
+
+
+async def test_join_closes_socket_when_game_is_gone(monkeypatch):
+    # игра завершилась или удалена между find_game в play_room и загрузкой
+    async def game_is_gone(game_sid):
+        return None
+    monkeypatch.setattr(game_service, "load_game", game_is_gone)
+    websocket = FakeWebSocket()
+    player_id, game_sid = 10_001, 10_001
+    assert await manager.connect(player_id, websocket)
+    connection = GameConnection(game_sid, player_id)
+    try:
+        await connection.join()
+    finally:
+        await manager.disconnect(player_id)
+
+    assert json.loads(websocket.sent[-1])["event"] == "error"
+    assert websocket.close_code == status.WS_1008_POLICY_VIOLATION
+    assert await broker.get_owner(game_key(game_sid)) is None
+    # выход после отказа ничего не делает и никуда не пересылается
+    await connection.leave()
+
+
+@pytest.fixture
+async def started_game(game_sid):
+    active_game = await load_game(game_sid)
+    player1_id, player2_id = active_game.player_ids
+    active_game.connected_players.update(active_game.player_ids)
+    active_game.game.next_step_player_name = active_game.player_name(player1_id)
+    yield active_game
+    for player_id in (player1_id, player2_id):
+        await manager.disconnect(player_id)
+
+
+async def test_slow_opponent_does_not_hold_the_game(started_game):
+    player1_id, player2_id = started_game.player_ids
+    gate = anyio.Event()
+    shooter, opponent = FakeWebSocket(), FakeWebSocket(gate)
+    assert await manager.connect(player1_id, shooter)
+    assert await manager.connect(player2_id, opponent)
+
+    async with anyio.create_task_group() as task_group:
+        task_group.start_soon(play_move, started_game, player1_id, ClientMessage(x="a", y=1))
+        with anyio.fail_after(1):
+            while len(shooter.sent) < 2:
+                await anyio.sleep(0.01)
+        # стрелявший получил результат, пока соперник ещё не принял события; lock игры свободен
+        assert opponent.sent == []
+        assert not started_game.lock.locked()
+        gate.set()
+    assert [json.loads(frame)["event"] for frame in opponent.sent] == [
+        json.loads(frame)["event"] for frame in shooter.sent
+    ]
+
+
+async def test_failed_send_is_logged(started_game, caplog):
+    player1_id, player2_id = started_game.player_ids
+    shooter = FakeWebSocket()
+    assert await manager.connect(player1_id, shooter)
+    assert await manager.connect(player2_id, FakeWebSocket(broken=True))
+
+    with caplog.at_level(logging.WARNING, logger="src.connection_manager"):
+        await play_move(started_game, player1_id, ClientMessage(x="a", y=1))
+    assert len(shooter.sent) == 2
+    assert f"to player {player2_id}" in caplog.text
@@ -0,0 +1,95 @@
+import pytest
+
+from src.game_board import BitBoard, ShotResult
+from src.game_rules import resolve_move
+from src.schemas import (
+    AlreadyCheckedEvent, ErrorEvent, HitEvent, MissEvent, MoveEvent, PausedEvent, ShipType, SunkEvent,
+    TurnEvent, WinEvent,
+)
+
+# a1-b1 - двухпалубный, j10 - одиночный
+DESTROYER = (0, 1)
+SPEEDBOAT = 99
+
+
+@pytest.fixture
+def board():
+    board = BitBoard()
+    board.add_ship(ShipType.DESTROYER.value, 1 << DESTROYER[0] | 1 << DESTROYER[1])
+    board.add_ship(ShipType.SPEEDBOAT.value, 1 << SPEEDBOAT)
+    return board
+
+
+def move(board, cell_index: int, **overrides):
+    arguments = {
+        "target_board": board,
+        "cell_index": cell_index,
+        "player_id": 1,
+        "player_name": "player1",
+        "player2_id": 2,
+        "player2_name": "player2",
+        "next_step_player_name": "player1",
+        "player2_connected": True,
+        "game_finished": False,
+        **overrides,
+    }
+    return resolve_move(**arguments)
+
+
+def event_types(resolution) -> list[type]:
+    return [type(event) for event in resolution.events]
+
+
+def test_miss_passes_the_turn(board):
+    resolution = move(board, 50)
+    assert resolution.shot == ShotResult.MISS
+    assert resolution.accepted
+    assert resolution.cell == "a6"
+    assert event_types(resolution) == [MoveEvent, MissEvent]
+    assert resolution.next_step_player_name == "player2"
+
+
+def test_hit_and_sunk_keep_the_turn(board):
+    resolution = move(board, DESTROYER[0])
+    assert resolution.shot == ShotResult.HIT
+    assert event_types(resolution) == [MoveEvent, HitEvent]
+    assert resolution.next_step_player_name == "player1"
+
+    resolution = move(board, DESTROYER[1])
+    assert resolution.shot == ShotResult.SUNK
+    assert event_types(resolution) == [MoveEvent, SunkEvent]
+    assert resolution.next_step_player_name == "player1"
+
+
+def test_last_ship_wins(board):
+    move(board, DESTROYER[0])
+    move(board, DESTROYER[1])
+    resolution = move(board, SPEEDBOAT)
+    assert resolution.shot == ShotResult.WIN
+    assert resolution.accepted
+    assert event_types(resolution) == [MoveEvent, SunkEvent, WinEvent]
+
+
+def test_cell_already_shot(board):
+    move(board, 50)
+    resolution = move(board, 50)
+    assert resolution.shot == ShotResult.ALREADY_CHECKED
+    assert not resolution.accepted
+    assert event_types(resolution) == [AlreadyCheckedEvent]
+    assert resolution.events[0].player_id == 1
+
+
+@pytest.mark.parametrize(("overrides", "event_type"), [
+    ({"next_step_player_name": "player2"}, TurnEvent),
+    ({"player2_connected": False}, PausedEvent),
+    ({"game_finished": True}, ErrorEvent),
+    # окончание игры проверяется раньше паузы: после победы соперника отключают
+    ({"game_finished": True, "player2_connected": False}, ErrorEvent),
+])
+def test_rejected_move_does_not_shoot(board, overrides, event_type):
+    resolution = move(board, DESTROYER[0], **overrides)
+    assert resolution.shot is None
+    assert not resolution.accepted
+    assert event_types(resolution) == [event_type]
+    assert board.shots_mask == 0
+    assert resolution.next_step_player_name == overrides.get("next_step_player_name", "player1")
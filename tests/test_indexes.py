@@ -0,0 +1,115 @@
+import pytest
+from sqlalchemy import text
+from sqlmodel import select
+
+from src.models import User, Move, PlayerStats
+from src.schemas import ACTIVE_GAME_RESULTS
+from src.api.routes import select_player_games, select_player_history
+from src.game_service import select_not_ended_game, select_game_with_boards
+
+pytestmark = pytest.mark.anyio
+
+# запрос -> индексы, которые должны быть в плане, по диалектам (None - не проверяется)
+CHECKS = [
+    (
+        "active games of a player (GET /games)",
+        select_player_games(1, ACTIVE_GAME_RESULTS),
+        {
+            "postgresql": ["ix_game_player1_id_result", "ix_game_player2_id_result", "ix_gameboard_game_sid"],
+            "sqlite": ["ix_game_player1_id_result", "ix_game_player2_id_result", "ix_gameboard_game_sid"],
+        },
+    ),
+    (
+        "finished games of a player (GET /players/{name}/stats)",
+        select_player_history(1, 1000, 20),
+        {
+            "postgresql": ["ix_game_player1_id_result", "ix_game_player2_id_result"],
+            "sqlite": ["ix_game_player1_id_result", "ix_game_player2_id_result"],
+        },
+    ),
+    (
+        "stats summary of a player (GET /players/{name}/stats/summary)",
+        select(User.username, PlayerStats).outerjoin(
+            PlayerStats, PlayerStats.player_id == User.id,
+        ).where(User.username == "player"),
+        {
+            "postgresql": ["ix_user_username", "playerstats_pkey"],
+            "sqlite": ["ix_user_username", "INTEGER PRIMARY KEY"],
+        },
+    ),
+    (
+        "game for play_room",
+        select_not_ended_game(1),
+        {
+            "postgresql": ["game_pkey"],
+            "sqlite": ["INTEGER PRIMARY KEY"],
+        },
+    ),
+    (
+        "game with boards (loading an active game)",
+        select_game_with_boards(1),
+        {
+            "postgresql": ["game_pkey", "ix_gameboard_game_sid"],
+            "sqlite": ["INTEGER PRIMARY KEY", "ix_gameboard_game_sid"],
+        },
+    ),
+    (
+        "user by name (login, registration, create game)",
+        select(User).where(User.username == "player"),
+        {
+            "postgresql": ["ix_user_username"],
+            "sqlite": ["ix_user_username"],
+        },
+    ),
+    (
+        "lobby page with name prefix (GET /players)",
+        select(User.id, User.username).where(
+            User.disabled == True,
+            User.username.startswith("pla", autoescape=True),
+        ).order_by(User.id).limit(50),
+        {
+            "postgresql": ["ix_user_username"],
+            # LIKE в SQLite регистронезависимый и индекс по префиксу не использует
+            "sqlite": None,
+        },
+    ),
+    (
+        "lobby page (GET /players)",
+        select(User.id, User.username).where(User.disabled == True, User.id > 0).order_by(User.id).limit(50),
+        {
+            "postgresql": ["ix_user_disabled_id"],
+            "sqlite": ["ix_user_disabled_id"],
+        },
+    ),
+    (
+        "move log of a game (loading an active game)",
+        select(Move).where(Move.game_sid == 1).order_by(Move.seq),
+        {
+            "postgresql": ["move_game_sid_seq_key"],
+            "sqlite": ["sqlite_autoindex_move_1"],
+        },
+    ),
+]
+
+
+async def explain(connection, sql: str) -> str:
+    if connection.dialect.name == "postgresql":
+        # иначе на маленьких таблицах планировщик честно выбирает полный просмотр
+        await connection.execute(text("SET enable_seqscan = off"))
+        rows = await connection.execute(text(f"EXPLAIN {sql}"))
+        return "\n".join(row[0] for row in rows)
+    rows = await connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"))
+    return "\n".join(row[-1] for row in rows)
+
+
+@pytest.mark.parametrize("statement, expected", [check[1:] for check in CHECKS], ids=[check[0] for check in CHECKS])
+async def test_query_uses_indexes(database, statement, expected):
+    indexes = expected.get(database.dialect.name)
+    if indexes is None:
+        pytest.skip(f"not checked on {database.dialect.name}")
+    sql = str(statement.compile(dialect=database.dialect, compile_kwargs={"literal_binds": True}))
+    async with database.connect() as connection:
+        plan = await explain(connection, sql)
+        await connection.rollback()
+    missing = [index for index in indexes if index not in plan]
+    assert not missing, f"no {', '.join(missing)} in plan:\n{plan}"
@@ -0,0 +1,36 @@
+import pytest
+
+from src import database
+from src.api.auth import get_user_by_username
+from src.presence import presence
+from tests.helpers import login, request
+
+pytestmark = pytest.mark.anyio
+
+
+async def lobby_names(client, headers, prefix: str) -> list[str]:
+    response = await request(client, "GET", "/players", headers=headers, params={"prefix": prefix})
+    return [user["username"] for user in response.json()]
+
+
+async def test_presence_overlay_is_applied_after_cache(client, players):
+    player1, player2 = players
+    headers = await login(client, player1)
+    async with database.async_session() as async_session:
+        user2 = await get_user_by_username(player2, async_session)
+    presence.set_online(user2.id)
+    await presence.flush()
+    try:
+        # в БД player2 онлайн, страница с этим попадает в кеш
+        assert await lobby_names(client, headers, player2) == []
+
+        # отключение ещё не записано: страница из кеша, player2 добавляется из памяти
+        presence.set_offline(user2.id, user2.username)
+        assert await lobby_names(client, headers, player2) == [player2]
+
+        # снова подключился к этому воркеру
+        presence.set_online(user2.id)
+        assert await lobby_names(client, headers, player2) == []
+    finally:
+        presence.set_offline(user2.id, user2.username)
+        await presence.flush()
@@ -0,0 +1,60 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from src.metrics import (
+    MetricsRegistry, RequestDurationMiddleware, db_pool_checkout_wait, db_statement_duration, http_request_duration,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+def test_monotonic_stats_are_counters():
+    registry = MetricsRegistry("test")
+    registry.add_collector(
+        "cache", lambda: {"size": 3, "hits": 5, "wait_time_total": 0.5}, counters=("hits", "wait_time_total"),
+    )
+    lines = registry.render().splitlines()
+    assert "# TYPE test_cache_size gauge" in lines
+    assert "# TYPE test_cache_hits_total counter" in lines
+    assert "test_cache_hits_total 5" in lines
+    # суффикс _total не удваивается
+    assert "# TYPE test_cache_wait_time_total counter" in lines
+
+
+async def test_failed_request_is_recorded_as_500():
+    app = FastAPI()
+    app.add_middleware(RequestDurationMiddleware)
+
+    @app.get("/fail/{item_id}")
+    async def fail(item_id: int):
+        raise RuntimeError("boom")
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/fail/1")
+    assert response.status_code == 500
+    counts, _ = http_request_duration.values[("GET", "/fail/{item_id}", "500")]
+    assert sum(counts) == 1
+
+
+def observed(histogram, *labelvalues) -> int:
+    item = histogram.values.get(labelvalues)
+    return sum(item[0]) if item else 0
+
+
+async def test_failed_statement_does_not_break_statement_timing(database):
+    waits = observed(db_pool_checkout_wait)
+    selects = observed(db_statement_duration, "select")
+    async with database.connect() as connection:
+        with pytest.raises(DBAPIError):
+            await connection.execute(text("SELECT * FROM missing_table"))
+        await connection.rollback()
+        await connection.execute(text("SELECT 1"))
+        await connection.execute(text("SELECT 2"))
+
+    # упавший запрос не записан, следующие измерены от своего старта
+    assert observed(db_statement_duration, "select") == selects + 2
+    assert observed(db_pool_checkout_wait) == waits + 1
@@ -0,0 +1,38 @@
+import pytest
+from sqlmodel import delete
+
+from src import database
+from src.api.auth import get_user_by_username
+from src.game_service import load_game
+from src.models import PlayerStats
+from tests.helpers import request
+
+pytestmark = pytest.mark.anyio
+
+
+async def summary(client, username: str) -> dict:
+    return (await request(client, "GET", f"/players/{username}/stats/summary")).json()
+
+
+async def test_finished_game_upserts_missing_stats_row(client, players, game_sid):
+    player1, player2 = players
+    async with database.async_session() as async_session:
+        user1 = await get_user_by_username(player1, async_session)
+        user2 = await get_user_by_username(player2, async_session)
+        # строки нет: игрок зарегистрирован до миграции или регистрация оборвалась
+        await async_session.execute(delete(PlayerStats).where(PlayerStats.player_id == user1.id))
+        await async_session.commit()
+
+    active_game = await load_game(game_sid)
+    # три хода первого игрока и два второго
+    active_game.moves_by_player = {user1.id: 3, user2.id: 2}
+    active_game.set_result(user1.id)
+    async with database.async_session() as async_session:
+        await active_game.save(async_session)
+
+    stats1, stats2 = await summary(client, player1), await summary(client, player2)
+    assert (stats1["games_played"], stats1["wins"], stats1["losses"]) == (1, 1, 0)
+    assert (stats2["games_played"], stats2["wins"], stats2["losses"]) == (1, 0, 1)
+    # длина игры - только собственные ходы игрока
+    assert stats1["average_game_length"] == 3.0
+    assert stats2["average_game_length"] == 2.0
@@ -0,0 +1,93 @@
+import pytest
+
+from src.game_registry import game_registry
+from src.game_service import find_game, load_game
+from tests.helpers import create_game, login, register, request
+
+pytestmark = pytest.mark.anyio
+
+# эндпоинт -> (запросов, строк) не больше; на Postgres их не больше, чем на SQLite
+BUDGETS = {
+    "POST /players/register": (4, 2),
+    "POST /players/login": (1, 1),
+    "POST /games/create": (4, 2),
+    "GET /games": (2, 2),
+    "GET /players": (1, 1),
+    "GET /players/{name}/stats": (2, 1),
+    "GET /players/{name}/stats/summary": (1, 1),
+    "play_room: game lookup": (1, 1),
+    "play_room: load_game": (2, 2),
+    "play_room: reconnect": (0, 0),
+}
+
+
+def assert_budget(name: str, measured: tuple[int, int]):
+    statements, rows = measured
+    max_statements, max_rows = BUDGETS[name]
+    assert statements <= max_statements, f"{name}: {statements} queries, budget {max_statements}"
+    assert rows <= max_rows, f"{name}: {rows} rows, budget {max_rows}"
+
+
+async def test_register(client, recorder, players, unique_name):
+    assert_budget("POST /players/register", await recorder.measure(
+        lambda: register(client, unique_name("player3")),
+    ))
+
+
+async def test_login(client, recorder, players):
+    assert_budget("POST /players/login", await recorder.measure(lambda: login(client, players[0])))
+
+
+async def test_create_game(client, recorder, players):
+    player1, player2 = players
+    headers = await login(client, player1)
+    assert_budget("POST /games/create", await recorder.measure(lambda: create_game(client, headers, player2)))
+
+
+async def test_list_games(client, recorder, players, game_sid):
+    player1, player2 = players
+    headers = await login(client, player1)
+    # вторая игра - чтобы в списке игр была не одна строка
+    await create_game(client, headers, player2)
+    assert_budget("GET /games", await recorder.measure(lambda: request(client, "GET", "/games", headers=headers)))
+
+
+async def test_lobby(client, recorder, players):
+    player1, player2 = players
+    headers = await login(client, player1)
+    # лобби опрашивается периодически: игрок уже в кеше пользователей после первого запроса
+    await request(client, "GET", "/games", headers=headers)
+    assert_budget("GET /players", await recorder.measure(
+        lambda: request(client, "GET", "/players", headers=headers, params={"prefix": player2}),
+    ))
+
+
+async def test_stats(client, recorder, players, game_sid):
+    assert_budget("GET /players/{name}/stats", await recorder.measure(
+        lambda: request(client, "GET", f"/players/{players[0]}/stats"),
+    ))
+
+
+async def test_stats_summary(client, recorder, players):
+    assert_budget("GET /players/{name}/stats/summary", await recorder.measure(
+        lambda: request(client, "GET", f"/players/{players[0]}/stats/summary"),
+    ))
+
+
+async def test_game_lookup(recorder, game_sid):
+    assert_budget("play_room: game lookup", await recorder.measure(lambda: find_game(game_sid)))
+
+
+async def test_load_game(recorder, game_sid):
+    assert_budget("play_room: load_game", await recorder.measure(lambda: load_game(game_sid)))
+
+
+async def test_reconnect(recorder, game_sid):
+    # оба игрока вышли и переподключились в пределах срока снимка
+    await load_game(game_sid)
+    game_registry.park_game(game_sid)
+
+    async def reconnect():
+        await find_game(game_sid)
+        await load_game(game_sid)
+    assert_budget("play_room: reconnect", await recorder.measure(reconnect))
@@ -0,0 +1,33 @@
+import anyio
+import pytest
+
+from src.broker import broker, game_key
+from src.game_registry import game_registry
+from src.game_service import load_game, snapshot_sweeper
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_sweep_releases_expired_snapshot(game_sid):
+    assert await broker.claim(game_key(game_sid)) == broker.worker_id
+    active_game = await load_game(game_sid)
+    game_registry.park_game(game_sid)
+    game_registry.snapshots.set(game_sid, active_game, ttl=0.01)
+    await anyio.sleep(0.02)
+
+    await snapshot_sweeper.sweep()
+
+    assert game_registry.peek_game(game_sid) is None
+    assert await broker.get_owner(game_key(game_sid)) is None
+
+
+async def test_sweep_keeps_live_snapshot(game_sid):
+    assert await broker.claim(game_key(game_sid)) == broker.worker_id
+    await load_game(game_sid)
+    game_registry.park_game(game_sid)
+
+    await snapshot_sweeper.sweep()
+
+    assert game_registry.peek_game(game_sid) is not None
+    assert await broker.get_owner(game_key(game_sid)) == broker.worker_id
+    await broker.release(game_key(game_sid))
@@ -0,0 +1,32 @@
+import pytest
+
+from src import database
+from src.api.auth import get_user_by_username
+from src.presence import presence
+from src.user_cache import CachedUser, user_cache
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_cached_user_is_immutable_snapshot(players):
+    async with database.async_session() as async_session:
+        user = await get_user_by_username(players[0], async_session)
+    assert isinstance(user, CachedUser)
+    assert user.disabled is True
+    with pytest.raises(AttributeError):
+        user.disabled = False
+
+
+async def test_presence_flush_invalidates_cached_user(players):
+    async with database.async_session() as async_session:
+        user = await get_user_by_username(players[0], async_session)
+    assert user_cache.peek(players[0]) is not None
+
+    presence.set_online(user.id)
+    await presence.flush()
+
+    assert user_cache.peek(players[0]) is None
+    async with database.async_session() as async_session:
+        assert (await get_user_by_username(players[0], async_session)).disabled is False
+    presence.set_offline(user.id, user.username)
+    await presence.flush()
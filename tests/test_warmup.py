@@ -0,0 +1,63 @@
+import threading
+
+import anyio
+import pytest
+
+from src.broker import broker
+from src.warmup import WarmUp, warm_up
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_required_step_is_retried_until_it_succeeds():
+    warm_up_steps = WarmUp(retry_interval=0.01)
+    calls = []
+    release = anyio.Event()
+
+    async def flaky():
+        calls.append("flaky")
+        if len(calls) == 1:
+            raise ConnectionError("database is not up yet")
+        await release.wait()
+
+    async def broken():
+        raise RuntimeError("optional")
+
+    threads = []
+    warm_up_steps.add_step("db_pool", flaky, required=True)
+    warm_up_steps.add_step("optional", broken)
+    warm_up_steps.add_step("blocking", lambda: threads.append(threading.current_thread()), blocking=True)
+    await warm_up_steps.start()
+    try:
+        while len(calls) < 2:
+            await anyio.sleep(0.01)
+        # необязательный шаг упал, обязательный ещё не выполнен - воркер не готов
+        assert not warm_up_steps.ready
+        release.set()
+        while not warm_up_steps.ready:
+            await anyio.sleep(0.01)
+    finally:
+        await warm_up_steps.stop()
+
+    assert warm_up_steps.failing == {"optional"}
+    assert warm_up_steps.failed == 2
+    assert threads and threads[0] is not threading.main_thread()
+
+
+async def test_ready_reports_failing_steps(client, monkeypatch):
+    monkeypatch.setattr(warm_up, "ready", False)
+    monkeypatch.setattr(warm_up, "failing", {"db_pool"})
+    response = await client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["detail"] == "Warm-up failed: db_pool"
+
+    monkeypatch.setattr(warm_up, "ready", True)
+    assert (await client.get("/ready")).status_code == 200
+
+
+async def test_ready_requires_broker_subscription(client, monkeypatch):
+    monkeypatch.setattr(warm_up, "ready", True)
+    monkeypatch.setattr(broker, "connected", False)
+    response = await client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["detail"] == "Message broker is disconnected"